@@ -1,38 +1,13 @@
-import yfinance as yf
-import pandas as pd
+import numpy as np
 import ta
 from ta.volatility import AverageTrueRange
-import os
-
-def download_crypto_data(symbol: str, 
-                          ltf_interval: str = '15m', ltf_period: str = '60d',
-                          htf_interval: str = '1h', htf_period: str = '6mo'):
-    """
-    Downloads cryptocurrency price data from Yahoo Finance for two different timeframes.
-
-    Parameters:
-        symbol (str): The ticker symbol of the cryptocurrency (e.g., 'BTC-USD').
-        ltf_interval (str): Interval for the low time frame data (default '15m').
-        ltf_period (str): Period for the low time frame data (default '60d').
-        htf_interval (str): Interval for the high time frame data (default '1h').
-        htf_period (str): Period for the high time frame data (default '6mo').
-
-    Returns:
-        tuple: DataFrames for low time frame (ltf) and high time frame (htf) price data.
-    """
-    
-    print(f"\U0001F4E5 Downloading {symbol} data...")
-    
-    # Download low time frame (ltf) data
-    ltf = yf.download(symbol, interval=ltf_interval, period=ltf_period, auto_adjust=False)
-    # Download high time frame (htf) data
-    htf = yf.download(symbol, interval=htf_interval, period=htf_period, auto_adjust=False)
-
-    # Flatten MultiIndex columns if necessary
-    ltf.columns = [col[0].title() if isinstance(col, tuple) else col.title() for col in ltf.columns]
-    htf.columns = [col[0].title() if isinstance(col, tuple) else col.title() for col in htf.columns]
-
-    return ltf, htf
+from bar_store import download_crypto_data
+from trend_filter import classify_trend_bias
+from breakout_detector import breakout_mask
+from ote_zone import calculate_ote_zones
+from entry_trigger import detect_entry_signals as detect_entry_signals_by_touch
+from backtest import run_backtest as run_exit_backtest
+from risk_reward import atr_levels, forward_extreme
 
 def add_indicators(df):
     """
@@ -62,313 +37,65 @@ def add_indicators(df):
 
     return df
 
-def classify_trend_bias(ltf_df, htf_df):
-    #make sure both Dataframe are datetime indexed
-    ltf_df = ltf_df.copy()
-    htf_df = htf_df.copy()
-    ltf_df.index = pd.to_datetime(ltf_df.index)
-    htf_df.index = pd.to_datetime(htf_df.index)
-
-    #Create a trend_bias column
-    trend_bias = []
-
-    for timestamp in ltf_df.index:
-        #find the most recent HTF candle <== current LTF timeframe
-        htf_time = htf_df.index[htf_df.index <= timestamp].max()
-
-        if pd.isna(htf_time):
-            trend_bias.append('neutral')
-            continue
-
-        row = htf_df.loc[htf_time]
-        ema_50 = row['ema_50']
-        ema_200 = row['ema_200']
-
-        if pd.isna(ema_50) or pd.isna(ema_200):
-            trend_bias.append("neutral")
-        elif ema_50 > ema_200:
-            trend_bias.append('bullish')
-        elif ema_50 < ema_200:
-            trend_bias.append('bearish')
-        else:
-            trend_bias.append('neutral')
-
-    ltf_df['trend_bias'] = trend_bias
-    return ltf_df
-
-def detect_breakouts(df, range_window=10, range_pct=0.005, vol_multiplier=1.5, rsi_threshold=60):
-    df = df.copy()
-    df['is_breakout'] = False
-
-    for i in range(range_window, len(df)):
-        window = df.iloc[i - range_window:i]
-        candle= df.iloc[i]
-
-        if candle['trend_bias'] not in ['bullish', 'bearish']:
-            continue
-
-        max_high = window['High'].max()
-        min_low = window['Low'].min()
-        range_size = max_high - min_low
-        mid_price = (max_high + min_low) / 2
-        if range_size / mid_price > range_pct:
-            continue
-
-        body = abs(candle["Close"] - candle['Open'])
-        median_body = window['Close'].sub(window["Open"]).abs().median()
-        if body < 1.5 * median_body:
-            continue
-
-        # Directional breakout (based on trend)
-        if candle["trend_bias"] == "bullish" and candle["Close"] <= max_high:
-            continue
-        if candle["trend_bias"] == "bearish" and candle["Close"] >= min_low:
-            continue
-
-        # Volume & momentum
-        if candle["Volume"] < vol_multiplier * candle["vol_avg_20"]:
-            continue
-        if candle["trend_bias"] == "bullish" and candle["rsi"] < rsi_threshold:
-            continue
-        if candle["trend_bias"] == "bearish" and candle["rsi"] > (100 - rsi_threshold):
-            continue
-
-        df.at[df.index[i], "is_breakout"] = True
-
+def detect_breakouts(df, range_window=10, range_pct=0.005, vol_multiplier=1.5, rsi_threshold=60, copy=True):
+    if copy:
+        df = df.copy()
+    df['is_breakout'] = breakout_mask(df, range_window, range_pct, vol_multiplier, rsi_threshold)
     return df
 
-def calculate_ote_zones(df, lookback=10):
+def detect_entry_signals(df, max_wait=10, touch="overlap", copy=True):
     """
-    For each breakout candle, calculate the OTE (Optimal Trade Entry) zone
-    using a custom Fibonacci retracement: 0.62 to 0.79 (best at 0.705).
+    After each breakout, scan up to `max_wait` candles ahead for an OTE entry trigger.
+    Entry = candle range overlaps the OTE zone (touch="close" for the entry_trigger rule).
+    Only the first valid entry per breakout is taken.
     """
-    df = df.copy()
-    df["ote_start"] = None
-    df["ote_best"] = None
-    df["ote_end"] = None
-    df["ote_dir"] = None
-
-    for i in range(lookback, len(df)):
-        row = df.iloc[i]
-
-        if not row["is_breakout"]:
-            continue
-
-        bias = row["trend_bias"]
-        if bias not in ["bullish", "bearish"]:
-            continue
+    return detect_entry_signals_by_touch(df, max_wait=max_wait, touch=touch, copy=copy)
 
-        # Identify swing high/low N bars before breakout
-        lookback_window = df.iloc[i - lookback:i]
-
-        if bias == "bullish":
-            swing_low = lookback_window["Low"].min()
-            breakout_high = row["High"]
-
-            impulse_range = breakout_high - swing_low
-            ote_start = breakout_high - 0.62 * impulse_range
-            ote_best = breakout_high - 0.705 * impulse_range
-            ote_end = breakout_high - 0.79 * impulse_range
-
-        elif bias == "bearish":
-            swing_high = lookback_window["High"].max()
-            breakout_low = row["Low"]
-
-            impulse_range = swing_high - breakout_low
-            ote_start = breakout_low + 0.62 * impulse_range
-            ote_best = breakout_low + 0.705 * impulse_range
-            ote_end = breakout_low + 0.79 * impulse_range
-
-        else:
-            continue  # Just in case
-
-        # 🪵 Debug log for manual inspection
-        print(f"📐 OTE Zone [{df.index[i]}]:")
-        print(f"    ➤ Direction: {bias}")
-        print(f"    ➤ OTE Range: {round(ote_end, 2)} → {round(ote_start, 2)} (best = {round(ote_best, 2)})")
-        print(f"    ➤ Breakout Candle Close: {row['Close']}\n")
-
-        # Store the values in the DataFrame
-        df.at[df.index[i], "ote_start"] = round(ote_start, 2)
-        df.at[df.index[i], "ote_best"] = round(ote_best, 2)
-        df.at[df.index[i], "ote_end"] = round(ote_end, 2)
-        df.at[df.index[i], "ote_dir"] = bias
-
-    return df
 
-def detect_entry_signals(df, max_wait=10):
+def set_risk_reward(df, atr_window=14, lookback=30, copy=True, atr=None):
     """
-    After each breakout, scan up to `max_wait` candles ahead for an OTE entry trigger.
-    Entry = candle enters the OTE zone + closes in the direction of the trend.
+    ATR based SL (1 ATR), TP1 (1.5 ATR) and TP2 (2.5 ATR) for every entry,
+    with TP2 capped by the highest high / lowest low of the next `lookback` candles.
+    `atr` may pass an already computed ATR series instead of recomputing it
+    from the first row of `df`.
     """
-    df = df.copy()
-    df["is_entry"] = False
-    df["entry_price"] = None
-    df["entry_time"] = None
-    df["entry_from_breakout_time"] = None  # ✅ Track source breakout
-
-    for i in range(len(df)):
-        if not df.iloc[i]["is_breakout"]:
-            continue
-
-        if pd.isna(df.iloc[i]["ote_dir"]):
-            continue
-
-        direction = df.iloc[i]["ote_dir"]
-        ote_start = df.iloc[i]["ote_start"]
-        ote_end = df.iloc[i]["ote_end"]
-
-        for j in range(1, max_wait + 1):
-            if i + j >= len(df):
-                break
-            candle = df.iloc[i + j]
-
-            if direction == "bullish":
-                if candle["Low"] <= ote_end and candle["High"] >= ote_start:
-                    df.at[df.index[i + j], "is_entry"] = True
-                    df.at[df.index[i + j], "entry_price"] = candle["Close"]
-                    df.at[df.index[i + j], "entry_time"] = df.index[i + j]
-                    df.at[df.index[i + j], "entry_from_breakout_time"] = df.index[i]  # ✅ Store breakout time
-                    break  # take the first valid entry
-
-            elif direction == "bearish":
-                if candle["High"] >= ote_end and candle["Low"] <= ote_start:
-                    df.at[df.index[i + j], "is_entry"] = True
-                    df.at[df.index[i + j], "entry_price"] = candle["Close"]
-                    df.at[df.index[i + j], "entry_time"] = df.index[i + j]
-                    df.at[df.index[i + j], "entry_from_breakout_time"] = df.index[i]  # ✅ Store breakout time
-                    break
-
-    return df
-
-
-def set_risk_reward(df, atr_window=14, lookback=30):
-    df = df.copy()
-
-    # Initialize new columns
-    df["stop_loss"] = None
-    df["take_profit_1"] = None
-    df["take_profit_2"] = None
-    df["rr_1"] = None
-    df["rr_2"] = None
+    if copy:
+        df = df.copy()
 
     # Calculate ATR for dynamic volatility context
-    atr = AverageTrueRange(high=df["High"], low=df["Low"], close=df["Close"], window=atr_window).average_true_range()
+    if atr is None:
+        atr = AverageTrueRange(high=df["High"], low=df["Low"], close=df["Close"], window=atr_window).average_true_range()
     df["atr"] = atr
 
-    for i in range(lookback, len(df)):
-        row = df.iloc[i]
-
-        if not row.get("is_entry"):
-            continue
-
-        direction = row["ote_dir"]
-        entry = row["entry_price"]
-        current_atr = df.at[df.index[i], "atr"]
-
-        if pd.isna(current_atr) or current_atr == 0:
-            continue  # skip if ATR not available
-
-        # Define SL and base TP using ATR
-        if direction == "bullish":
-            sl = entry - current_atr
-            tp1 = entry + 1.5 * current_atr
-            tp2 = entry + 2.5 * current_atr
-
-            # Look ahead for next swing high to refine TP
-            future_high = df.iloc[i:i + lookback]["High"].max()
-            tp2 = min(tp2, future_high)  # structure-aware TP
-
-        elif direction == "bearish":
-            sl = entry + current_atr
-            tp1 = entry - 1.5 * current_atr
-            tp2 = entry - 2.5 * current_atr
-
-            # Look ahead for next swing low to refine TP
-            future_low = df.iloc[i:i + lookback]["Low"].min()
-            tp2 = max(tp2, future_low)  # structure-aware TP
-
-        else:
-            continue
-
-        # RR Calculations
-        rr1 = abs(tp1 - entry) / abs(entry - sl) if abs(entry - sl) > 0 else None
-        rr2 = abs(tp2 - entry) / abs(entry - sl) if abs(entry - sl) > 0 else None
-
-        # Set outputs
-        df.at[df.index[i], "stop_loss"] = round(sl, 2)
-        df.at[df.index[i], "take_profit_1"] = round(tp1, 2)
-        df.at[df.index[i], "take_profit_2"] = round(tp2, 2)
-        df.at[df.index[i], "rr_1"] = round(rr1, 2) if rr1 else None
-        df.at[df.index[i], "rr_2"] = round(rr2, 2) if rr2 else None
+    entry_pos = np.flatnonzero(df["is_entry"].fillna(False).to_numpy(dtype=bool))
+    entry_pos = entry_pos[entry_pos >= lookback]
+    ote_dir = df["ote_dir"].to_numpy(dtype=object)[entry_pos]
+    direction = np.select([ote_dir == "bullish", ote_dir == "bearish"], [1, -1], default=0)
+
+    # Look ahead for next swing high/low to refine TP2 (structure-aware TP)
+    future_high = forward_extreme(df["High"].to_numpy(dtype=float), lookback, "max")[entry_pos]
+    future_low = forward_extreme(df["Low"].to_numpy(dtype=float), lookback, "min")[entry_pos]
+
+    levels = atr_levels(
+        df["entry_price"].to_numpy(dtype=float)[entry_pos],
+        atr.to_numpy(dtype=float)[entry_pos],
+        direction,
+        rr1_mult=1.5, rr2_mult=2.5,
+        tp2_cap=np.where(direction > 0, future_high, future_low),
+    )
+
+    for column, values in zip(["stop_loss", "take_profit_1", "take_profit_2", "rr_1", "rr_2"], levels):
+        if column.startswith("rr_"):
+            values[values == 0] = np.nan  # a zero RR was never stored
+        full = np.full(len(df), np.nan)
+        full[entry_pos] = values
+        df[column] = full
 
     return df
 
-def run_backtest(df, max_holding=20):
-    df = df.copy()
-    df["trade_result"] = None
-    df["exit_price"] = None
-    df["exit_time"] = None
-    df["holding_time"] = None
-    df["reward_achieved"] = None
-
-    for i in range(len(df)):
-        if not bool(df.iloc[i].get("is_entry")):
-            continue
-
-        entry_time = df.index[i]
-        entry_price = df.iloc[i]["entry_price"]
-        sl = df.iloc[i]["stop_loss"]
-        tp1 = df.iloc[i]["take_profit_1"]
-        tp2 = df.iloc[i]["take_profit_2"]
-        rr1 = df.iloc[i]["rr_1"]
-        rr2 = df.iloc[i]["rr_2"]
-        direction = df.iloc[i]["ote_dir"]
-
-        outcome, exit_price, exit_time, r_mult = "timeout", None, None, 0
-
-        for j in range(1, max_holding + 1):
-            if i + j >= len(df):
-                break
-
-            future = df.iloc[i + j]
-            high, low = future["High"], future["Low"]
-            ts = df.index[i + j]
-
-            if direction == "bullish":
-                if low <= sl:
-                    outcome, exit_price, exit_time, r_mult = "loss", sl, ts, -1
-                    break
-                elif high >= tp2:
-                    outcome, exit_price, exit_time, r_mult = "tp2", tp2, ts, rr2
-                    break
-                elif high >= tp1:
-                    outcome, exit_price, exit_time, r_mult = "tp1", tp1, ts, rr1
-                    break
-
-            elif direction == "bearish":
-                if high >= sl:
-                    outcome, exit_price, exit_time, r_mult = "loss", sl, ts, -1
-                    break
-                elif low <= tp2:
-                    outcome, exit_price, exit_time, r_mult = "tp2", tp2, ts, rr2
-                    break
-                elif low <= tp1:
-                    outcome, exit_price, exit_time, r_mult = "tp1", tp1, ts, rr1
-                    break
-
-        # Timeout fallback
-        if outcome == "timeout":
-            final_index = min(i + max_holding, len(df) - 1)
-            exit_price = df.iloc[final_index]["Close"]
-            exit_time = df.index[final_index]
-
-        df.at[df.index[i], "trade_result"] = outcome
-        df.at[df.index[i], "exit_price"] = round(exit_price, 2)
-        df.at[df.index[i], "exit_time"] = exit_time
-        df.at[df.index[i], "reward_achieved"] = r_mult
-
-        holding_minutes = (exit_time - entry_time).total_seconds() / 60
-        df.at[df.index[i], "holding_time"] = round(holding_minutes, 1)
-
-    return df
+def run_backtest(df, max_holding=20, copy=True):
+    """
+    Resolves every entry against SL/TP1/TP2 (SL checked before TP2 before TP1)
+    or times out after `max_holding` candles. Adds float `reward_achieved` and `holding_time`.
+    """
+    return run_exit_backtest(df, max_holding=max_holding, ladder=True, copy=copy)
@@ -1,96 +1,244 @@
-import pandas as pd
+import json
 import os
-from a_backtest import (
-    download_crypto_data as download_A,
-    add_indicators as add_A,
-    classify_trend_bias as bias_A,
-    detect_breakouts as breakout_A,
-    calculate_ote_zones as ote_A,
-    detect_entry_signals as entry_A,
-    set_risk_reward as rr_A,
-    run_backtest as run_A
-)
-from b_backtest import (
-    download_crypto_data as download_B,
-    add_indicators as add_B,
-    classify_trend_bias as bias_B,
-    detect_breakouts as breakout_B,
-    calculate_ote_zones as ote_B,
-    detect_entry_signals as entry_B,
-    set_risk_reward_loose as rr_B,
-    run_backtest as run_B
-)
-
-def run_test(symbol, ltf_period, htf_period, test_type):
-    if test_type == 'A':
-        download, add_ind, bias, breakout, ote, entry, rr, run_bt = (
-            download_A, add_A, bias_A, breakout_A, ote_A, entry_A, rr_A, run_A)
-    else:
-        download, add_ind, bias, breakout, ote, entry, rr, run_bt = (
-            download_B, add_B, bias_B, breakout_B, ote_B, entry_B, rr_B, run_B)
+import pandas as pd
+import signal
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from bar_store import BarStore, download_crypto_data
+from pipeline import VARIANTS, Pipeline, run_variants
+from instrumentation import StageRecorder, aggregate_profiles, records_frame
+from results_store import RESULTS_DB, ResultsStore, trade_records
+from walk_forward import WalkForward
+
+# CSV export of the results database, rewritten once per sweep
+RESULTS_PATH = "backtest_result_combined.csv"
+
+def summarize_backtest(result_df, symbol, test_type, ltf_period, htf_period):
+    """Builds the one-row summary of a finished backtest."""
+    entries = result_df[result_df["is_entry"] == True]
+    wins = entries[entries["trade_result"].isin(["tp1", "tp2"])]
+    losses = entries[entries["trade_result"] == "loss"]
+
+    return {
+        "symbol": symbol,
+        "test_type": test_type,
+        "ltf_period": ltf_period,
+        "htf_period": htf_period,
+        "total_breakouts": int(result_df["is_breakout"].sum()),
+        "entries": int(len(entries)),
+        "wins": int(len(wins)),
+        "losses": int(len(losses)),
+        "win_rate": round(len(wins) / len(entries) * 100, 2) if len(entries) else 0,
+        "avg_holding_time": round(entries["holding_time"].mean(), 1) if len(entries) else 0,
+        "net_r": round(entries["reward_achieved"].sum(), 2) if len(entries) else 0
+    }
+
+def backtest_summary(symbol, ltf_period, htf_period, test_type, store=None, recorder=None):
+    """Downloads the data, runs one variant and returns its summary. Raises on any failure."""
+    return backtest_result(symbol, ltf_period, htf_period, test_type, store, recorder)[0]
+
+def backtest_result(symbol, ltf_period, htf_period, test_type, store=None, recorder=None):
+    """Like backtest_summary, but returns (summary, trades) with the per-trade rows."""
+    ltf_df, htf_df = download_crypto_data(symbol, ltf_period=ltf_period, htf_period=htf_period, store=store)
+    if ltf_df.empty or htf_df.empty:
+        raise ValueError("Empty DataFrame")
+
+    # one frame shared by every stage; the downloaded frames are not reused
+    result_df = Pipeline(test_type, track_memory=False, recorder=recorder).run(ltf_df, htf_df)
+    return summarize_backtest(result_df, symbol, test_type, ltf_period, htf_period), trade_records(result_df)
+
+def variant_summaries(symbol, ltf_period, htf_period, variants=VARIANTS, store=None, recorder=None):
+    """
+    Downloads the data once and returns one summary per variant. Stages the
+    variants share (indicators, trend bias, ...) are only computed once.
+    """
+    results = variant_results(symbol, ltf_period, htf_period, variants, store, recorder)
+    return [summary for summary, _ in results]
+
+def variant_results(symbol, ltf_period, htf_period, variants=VARIANTS, store=None, recorder=None):
+    """Like variant_summaries, but returns (summary, trades) pairs with the per-trade rows."""
+    ltf_df, htf_df = download_crypto_data(symbol, ltf_period=ltf_period, htf_period=htf_period, store=store)
+    if ltf_df.empty or htf_df.empty:
+        raise ValueError("Empty DataFrame")
+
+    results = run_variants(ltf_df, htf_df, variants, recorder=recorder)
+    return [
+        (summarize_backtest(result_df, symbol, name, ltf_period, htf_period), trade_records(result_df))
+        for name, result_df in results.items()
+    ]
+
+def walk_forward_summaries(symbol, ltf_period, htf_period, variants=VARIANTS, store=None, train="30D", test="7D",
+                           step="7D", grid=None):
+    """
+    Walk-forward version of variant_summaries: one summary row per variant
+    and test window, with the indicators computed once for all of them.
+    """
+    ltf_df, htf_df = download_crypto_data(symbol, ltf_period=ltf_period, htf_period=htf_period, store=store)
+    if ltf_df.empty or htf_df.empty:
+        raise ValueError("Empty DataFrame")
+
+    wf = WalkForward(ltf_df, htf_df, train, test, step)
+    return pd.concat([
+        wf.run(params, grid, labels={"symbol": symbol, "test_type": name, "ltf_period": ltf_period,
+                                     "htf_period": htf_period})
+        for name, params in variants.items()
+    ], ignore_index=True)
+
+def save_results(results, variants=VARIANTS, results_db=RESULTS_DB, file_path=RESULTS_PATH, run_id="default",
+                 export=True):
+    """
+    Upserts (summary, trades) pairs into the results database, keyed with
+    the parameter hash of their variant, so reruns replace their rows
+    instead of appending duplicates.
 
+    The run is attached to the CSV export at `file_path` (the rows already
+    in that file are imported on first use, see ResultsStore.attach_csv)
+    and, with `export`, the CSV is rewritten; otherwise call export_results
+    once after a batch of saves.
+    """
+    with ResultsStore(results_db) as db:
+        if file_path:
+            db.attach_csv(file_path, run_id)
+        if results:
+            db.upsert_many(
+                ((summary, variants.get(summary["test_type"]), trades) for summary, trades in results), run_id
+            )
+        if file_path and export:
+            db.export_attached(file_path)
+
+def export_results(results_db=RESULTS_DB, file_path=RESULTS_PATH):
+    """Rewrites the CSV export with every run attached to it; returns the row count."""
+    with ResultsStore(results_db) as db:
+        return db.export_attached(file_path)
+
+def run_test(symbol, ltf_period, htf_period, test_type, store=None, profile_dir=None, profile=False,
+             results_db=RESULTS_DB):
+    """
+    Runs one variant and saves its summary and trades to the results
+    database; the CSV export is not rewritten per test, call export_results
+    after the last one. With `profile_dir` every stage
+    is instrumented (see instrumentation.StageRecorder, `profile` adds
+    cProfile) and the run profile is written there as JSON and CSV.
+    """
     print(f"\n🔁 Running Test {test_type} | Symbol: {symbol} | LTF: {ltf_period} | HTF: {htf_period}")
-    
+
+    recorder = None
+    if profile_dir:
+        labels = {"symbol": symbol, "ltf_period": ltf_period, "htf_period": htf_period}
+        recorder = StageRecorder(labels, profile=profile, profile_dir=profile_dir if profile else None)
+
     try:
-        ltf_df, htf_df = download(symbol, ltf_period=ltf_period, htf_period=htf_period)
+        summary_data, trades = backtest_result(symbol, ltf_period, htf_period, test_type, store, recorder)
     except Exception as e:
-        print(f"❌ Failed to download data for {symbol}: {e}")
-        return
+        print(f"❌ Failed to process {symbol} | Test {test_type}{_failed_stage(recorder)}: {e}")
+        return None
+    finally:
+        if recorder is not None:
+            write_profile(recorder.records, profile_dir, f"{symbol}_{test_type}_{ltf_period}_{htf_period}")
 
-    if ltf_df.empty or htf_df.empty:
-        print("⚠️ Empty DataFrame. Skipping...")
-        return
+    save_results([(summary_data, trades)], results_db=results_db, export=False)
+    print(f"✅ Summary saved for {symbol} | Test {test_type}")
+    return summary_data
 
+def _failed_stage(recorder):
+    failed = [r["stage"] for r in (recorder.records if recorder else []) if "error" in r]
+    return f" (stage: {failed[-1]})" if failed else ""
+
+def write_profile(records, profile_dir, name):
+    """Writes stage records as <profile_dir>/<name>.json and .csv."""
+    os.makedirs(profile_dir, exist_ok=True)
+    path = os.path.join(profile_dir, name.replace("/", "_"))
+    with open(f"{path}.json", "w") as f:
+        json.dump(records, f, indent=2, default=str)
+    records_frame(records).to_csv(f"{path}.csv", index=False)
+
+def _on_timeout(signum, frame):
+    raise TimeoutError("job timed out")
+
+def _run_job(job, variants, store, timeout, profile=None):
+    """
+    Worker entry point: runs every variant of one (symbol, ltf, htf) job and
+    captures its failure. With `profile` (None, "stages" or "cprofile") the
+    job's stage records are returned as well.
+    """
+    # SIGALRM interrupts the job inside the worker so the slot is freed (POSIX only)
+    use_alarm = timeout is not None and hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_timeout)
+        signal.alarm(max(1, int(timeout)))
+    recorder = None
+    if profile:
+        labels = dict(zip(["symbol", "ltf_period", "htf_period"], job))
+        recorder = StageRecorder(labels, profile=profile == "cprofile")
+    records = recorder.records if recorder else []
     try:
-        ltf_df = add_ind(ltf_df)
-        htf_df = add_ind(htf_df)
-        ltf_df = bias(ltf_df, htf_df)
-        ltf_df = breakout(ltf_df)
-        ltf_df = ote(ltf_df)
-        ltf_df = entry(ltf_df)
-        ltf_df["ote_dir"] = ltf_df["ote_dir"].fillna(method="ffill", limit=10)
-        ltf_df = rr(ltf_df)
-        result_df = run_bt(ltf_df)
-
-        for i in result_df[result_df["is_entry"]].index:
-            breakout_time = result_df.loc[i, "entry_from_breakout_time"]
-            if pd.isna(breakout_time) or not result_df.loc[breakout_time, "is_breakout"]:
-                result_df.at[i, "is_entry"] = False
-                result_df.at[i, "entry_price"] = None
-                result_df.at[i, "entry_time"] = None
-
-        entries = result_df[result_df["is_entry"] == True]
-        wins = entries[entries["trade_result"].isin(["tp1", "tp2"])]
-        losses = entries[entries["trade_result"] == "loss"]
-
-        summary_data = {
-            "symbol": symbol,
-            "test_type": test_type,
-            "ltf_period": ltf_period,
-            "htf_period": htf_period,
-            "total_breakouts": int(result_df["is_breakout"].sum()),
-            "entries": int(len(entries)),
-            "wins": int(len(wins)),
-            "losses": int(len(losses)),
-            "win_rate": round(len(wins) / len(entries) * 100, 2) if len(entries) else 0,
-            "avg_holding_time": round(entries["holding_time"].mean(), 1) if len(entries) else 0,
-            "net_r": round(entries["reward_achieved"].sum(), 2) if len(entries) else 0
-        }
-
-        summary_df = pd.DataFrame([summary_data])
-        file_path = "backtest_result_combined.csv"
-        if os.path.exists(file_path):
-            summary_df.to_csv(file_path, mode='a', header=False, index=False)
-        else:
-            summary_df.to_csv(file_path, index=False)
-
-        print(f"✅ Summary saved for {symbol} | Test {test_type}")
-    
+        return variant_results(*job, variants=variants, store=store, recorder=recorder), None, records
     except Exception as e:
-        print(f"❌ Failed to process {symbol} | Test {test_type}: {e}")
+        return None, f"{type(e).__name__}{_failed_stage(recorder)}: {e}", records
+    finally:
+        if use_alarm:
+            signal.alarm(0)
+
+def run_sweep(jobs, variants=VARIANTS, max_workers=None, timeout=None, store=None, file_path=RESULTS_PATH,
+              profile_dir=None, profile="stages", results_db=RESULTS_DB, run_id="default"):
+    """
+    Fans (symbol, ltf_period, htf_period) jobs out over a process pool; each job
+    evaluates all `variants` on one download with their shared stages run once.
 
+    Parameters:
+        jobs (list): Job tuples in the order their results should be written.
+        variants (dict): name -> stage parameters, see pipeline.run_variants.
+        max_workers (int): Pool size (default: all cores).
+        timeout (float): Per-job time limit in seconds, None for no limit.
+        store (BarStore): Bar cache shared by the workers.
+        file_path (str): CSV export of the results database, rewritten once
+            by the parent after the sweep (None to skip it).
+        profile_dir (str): When set, every stage is instrumented and each job's
+            run profile plus the aggregated table (profile_summary.csv) is
+            written there.
+        profile (str): "stages" for timings/memory/signals, "cprofile" to
+            also capture a cProfile summary per stage.
+        results_db (str): Results database (see results_store.ResultsStore);
+            summaries and trades are upserted there in job order.
+        run_id (str): Sweep name in the results database.
 
-def main():
+    Returns:
+        tuple: (summaries, failures) where failures is a list of (job, error) pairs.
+    """
+    results = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        job_profile = profile if profile_dir else None
+        futures = {pool.submit(_run_job, job, variants, store, timeout, job_profile): i for i, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:  # the worker process itself died
+                results[i] = (None, f"{type(e).__name__}: {e}", [])
+
+            symbol, ltf, htf = jobs[i]
+            error = results[i][1]
+            status = f"❌ {error}" if error else "✅"
+            print(f"{status} {symbol} | LTF: {ltf} | HTF: {htf}")
+
+    saved = [result for job_results, error, _ in results if error is None for result in job_results]
+    failures = [(job, error) for job, (summary, error, _) in zip(jobs, results) if error is not None]
+    save_results(saved, variants, results_db, file_path, run_id)
+    summaries = [summary for summary, _ in saved]
+
+    if profile_dir:
+        for (symbol, ltf, htf), (_, _, records) in zip(jobs, results):
+            if records:
+                write_profile(records, profile_dir, f"{symbol}_{ltf}_{htf}")
+        all_records = [record for _, _, records in results for record in records]
+        table = aggregate_profiles(all_records, by=("stage",))
+        if not table.empty:
+            table.to_csv(os.path.join(profile_dir, "profile_summary.csv"))
+            print(table.to_string())
+
+    return summaries, failures
+
+
+def main(max_workers=None, timeout=600, profile_dir=None):
     symbols = [
     "AAPL",     # Apple
     "MSFT",     # Microsoft
@@ -138,10 +286,16 @@ def main():
     ltf_periods = ["60d","30d", "60d"]
     htf_periods = ["6mo", "6m0", "1y"]
 
-    for symbol in symbols:
-        for ltf, htf in zip(ltf_periods, htf_periods):
-            run_test(symbol, ltf, htf, test_type='A')
-            run_test(symbol, ltf, htf, test_type='B')
+    # every run after the first one per symbol is served from the local cache
+    store = BarStore("bar_cache")
+
+    jobs = [(symbol, ltf, htf) for symbol in symbols for ltf, htf in zip(ltf_periods, htf_periods)]
+    summaries, failures = run_sweep(jobs, max_workers=max_workers, timeout=timeout, store=store,
+                                    profile_dir=profile_dir)
+
+    print(f"\n✅ {len(summaries)} summaries saved to {RESULTS_DB} ({RESULTS_PATH}), {len(failures)} failed")
+    for (symbol, ltf, htf), error in failures:
+        print(f"❌ {symbol} | LTF: {ltf} | HTF: {htf}: {error}")
 
 
 if __name__ == "__main__":
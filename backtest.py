@@ -1,63 +1,130 @@
-def run_backtest(df, max_holding=20):
-    df = df.copy()
-    df["trade_result"] = None
-    df["exit_price"] = None
-    df["exit_time"] = None
-
-    for i in range(len(df)):
-        if df.iloc[i].get("is_entry") is not True:
-            continue
-
-        entry_price = df.iloc[i]["entry_price"]
-        sl = df.iloc[i]["stop_loss"]
-        tp = df.iloc[i]["take_profit_1"]
-        direction = df.iloc[i]["ote_dir"]
-
-        outcome = None
-        exit_price = None
-        exit_time = None
-
-        # Look ahead for max_holding candles
-        for j in range(1, max_holding + 1):
-            if i + j >= len(df):
-                break
-
-            future = df.iloc[i + j]
-            high = future["High"]
-            low = future["Low"]
-            ts = df.index[i + j]
-
-            if direction == "bullish":
-                if low <= sl:
-                    outcome = "loss"
-                    exit_price = sl
-                    exit_time = ts
-                    break
-                elif high >= tp:
-                    outcome = "win"
-                    exit_price = tp
-                    exit_time = ts
-                    break
-
-            elif direction == "bearish":
-                if high >= sl:
-                    outcome = "loss"
-                    exit_price = sl
-                    exit_time = ts
-                    break
-                elif low <= tp:
-                    outcome = "win"
-                    exit_price = tp
-                    exit_time = ts
-                    break
-
-        if outcome:
-            df.at[df.index[i], "trade_result"] = outcome
-            df.at[df.index[i], "exit_price"] = exit_price
-            df.at[df.index[i], "exit_time"] = exit_time
-        else:
-            df.at[df.index[i], "trade_result"] = "timeout"
-            df.at[df.index[i], "exit_price"] = df.iloc[i + max_holding]["Close"]
-            df.at[df.index[i], "exit_time"] = df.index[i + max_holding]
+import numpy as np
+import pandas as pd
+
+import jit_kernels
+
+# Outcome codes returned by resolve_exits, in order of precedence on a candle
+OUTCOMES = ["loss", "tp2", "tp1", "timeout"]
+LOSS, TP2, TP1, TIMEOUT = range(4)
+
+def resolve_exits(high, low, close, entry_pos, direction, stop_loss, take_profit_1, take_profit_2, max_holding=20,
+                  backend=None):
+    """
+    Resolves the exit of every trade at once.
+
+    Each trade looks at the `max_holding` candles after its entry through a
+    (trades x max_holding) strided view of High/Low. On the first candle that
+    hits anything, SL wins over TP2 which wins over TP1. Trades that never hit
+    time out at min(entry + max_holding, len - 1) on that candle's Close.
+
+    Parameters:
+        high, low, close (np.ndarray): Price arrays of the whole series.
+        entry_pos (np.ndarray): Positions of the entry candles.
+        direction (np.ndarray): +1 for bullish, -1 for bearish, 0 for no direction (always times out).
+        stop_loss, take_profit_1, take_profit_2 (np.ndarray): Levels per trade, NaN = never hit.
+        max_holding (int): Maximum number of candles a trade stays open.
+        backend (str): Kernel backend (see jit_kernels), None for the default.
+
+    Returns:
+        tuple: (exit_pos, outcome, exit_price) arrays; outcome holds codes into OUTCOMES.
+    """
+    n = len(close)
+    entry_pos = np.asarray(entry_pos, dtype=np.int64)
+    if jit_kernels.use_loops(backend):
+        return jit_kernels.resolve_exits_loop(
+            high, low, close, entry_pos, np.asarray(direction, dtype=np.int64),
+            np.asarray(stop_loss, dtype=float), np.asarray(take_profit_1, dtype=float),
+            np.asarray(take_profit_2, dtype=float), max_holding,
+        )
+
+    direction = np.asarray(direction)[:, None]
+    sl = np.asarray(stop_loss, dtype=float)[:, None]
+    tp1 = np.asarray(take_profit_1, dtype=float)[:, None]
+    tp2 = np.asarray(take_profit_2, dtype=float)[:, None]
+
+    # NaN padding past the end never triggers a hit
+    pad = np.full(max_holding, np.nan)
+    high_w = np.lib.stride_tricks.sliding_window_view(np.concatenate([high, pad]), max_holding)[entry_pos + 1]
+    low_w = np.lib.stride_tricks.sliding_window_view(np.concatenate([low, pad]), max_holding)[entry_pos + 1]
+
+    bullish = direction == 1
+    bearish = direction == -1
+    sl_hit = (bullish & (low_w <= sl)) | (bearish & (high_w >= sl))
+    tp2_hit = (bullish & (high_w >= tp2)) | (bearish & (low_w <= tp2))
+    tp1_hit = (bullish & (high_w >= tp1)) | (bearish & (low_w <= tp1))
+
+    any_hit = sl_hit | tp2_hit | tp1_hit
+    hit = any_hit.any(axis=1)
+    first = any_hit.argmax(axis=1)
+    rows = np.arange(len(entry_pos))
+
+    outcome = np.full(len(entry_pos), TIMEOUT, dtype=np.int8)
+    outcome[hit] = np.select(
+        [sl_hit[rows, first][hit], tp2_hit[rows, first][hit]], [LOSS, TP2], default=TP1
+    )
+
+    exit_pos = np.where(hit, entry_pos + 1 + first, np.minimum(entry_pos + max_holding, n - 1))
+    exit_price = np.select(
+        [outcome == LOSS, outcome == TP2, outcome == TP1],
+        [sl[:, 0], tp2[:, 0], tp1[:, 0]],
+        default=close[exit_pos],
+    )
+    return exit_pos, outcome, exit_price
+
+def run_backtest(df, max_holding=20, ladder=False, copy=True, backend=None):
+    """
+    Simulates every entry until SL, take profit or `max_holding` candles.
+
+    By default only TP1 is used and a hit is reported as "win". With
+    `ladder=True` TP2 is checked as well, outcomes are loss/tp2/tp1/timeout
+    and `reward_achieved` holds the R multiple of the trade.
+    """
+    if copy:
+        df = df.copy()
+    n = len(df)
+    is_entry = df["is_entry"].fillna(False).to_numpy(dtype=bool)
+    entry_pos = np.flatnonzero(is_entry)
+
+    ote_dir = df["ote_dir"].to_numpy(dtype=object)[entry_pos]
+    direction = np.select([ote_dir == "bullish", ote_dir == "bearish"], [1, -1], default=0)
+    levels = {c: df[c].to_numpy(dtype=float)[entry_pos] for c in ["stop_loss", "take_profit_1", "take_profit_2"]}
+    if not ladder:
+        levels["take_profit_2"] = np.full(len(entry_pos), np.nan)
+
+    exit_pos, outcome, exit_price = resolve_exits(
+        df["High"].to_numpy(dtype=float),
+        df["Low"].to_numpy(dtype=float),
+        df["Close"].to_numpy(dtype=float),
+        entry_pos, direction,
+        levels["stop_loss"], levels["take_profit_1"], levels["take_profit_2"],
+        max_holding=max_holding,
+        backend=backend,
+    )
+
+    # Without the ladder TP2 never hits and TP1 is reported as a plain "win"
+    labels = OUTCOMES if ladder else ["loss", "win", "timeout"]
+    codes = np.arange(4) if ladder else np.array([0, -1, 1, 2])
+    trade_result = np.full(n, -1, dtype=np.int8)
+    trade_result[entry_pos] = codes[outcome]
+    df["trade_result"] = pd.Categorical.from_codes(trade_result, categories=labels)
+
+    exit_at = np.zeros(n, dtype=np.int64)
+    exit_at[entry_pos] = exit_pos
+    column = np.full(n, np.nan)
+    column[entry_pos] = np.round(exit_price, 2)
+    df["exit_price"] = column
+    df["exit_time"] = df.index.to_series().iloc[exit_at].set_axis(df.index).where(is_entry)
+
+    holding = (df.index[exit_pos] - df.index[entry_pos]) / pd.Timedelta(minutes=1)
+    column = np.full(n, np.nan)
+    column[entry_pos] = np.round(np.asarray(holding, dtype=float), 1)
+    df["holding_time"] = column
+
+    if ladder:
+        rr_1 = df["rr_1"].to_numpy(dtype=float)[entry_pos]
+        rr_2 = df["rr_2"].to_numpy(dtype=float)[entry_pos]
+        column = np.full(n, np.nan)
+        column[entry_pos] = np.select([outcome == LOSS, outcome == TP2, outcome == TP1], [-1.0, rr_2, rr_1], default=0.0)
+        df["reward_achieved"] = column
 
     return df
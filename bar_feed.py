@@ -0,0 +1,225 @@
+import asyncio
+import threading
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+from live_runner import LiveRunner, SystemClock, VirtualClock
+
+OHLCV = ["Open", "High", "Low", "Close", "Volume"]
+
+# A bar feed is what the live code reads bars from. Every backend exposes
+#   feed(symbol, timeframe, limit)        -> DataFrame, same as get_live_data
+#   feed.many(symbols, timeframe, limit)  -> {symbol: DataFrame}
+#   feed.clock                            -> SystemClock or VirtualClock
+# so paper_trade.py / Back_test.py / LiveRunner run unchanged on live REST,
+# a recorded replay or synthetic bars.
+
+class BarFeed(ABC):
+    clock = None
+
+    @abstractmethod
+    def __call__(self, symbol, timeframe="15Min", limit=100):
+        """The last `limit` bars of `symbol`, the forming one last."""
+
+    def many(self, symbols, timeframe="15Min", limit=100):
+        return {symbol: self(symbol, timeframe, limit) for symbol in symbols}
+
+class LiveFeed(BarFeed):
+    """Alpaca REST bars through live_data's shared BarClient, on the wall clock."""
+
+    def __init__(self, client=None):
+        from live_data import get_client
+
+        self.client = client or get_client()
+        self.clock = SystemClock()
+
+    def __call__(self, symbol, timeframe="15Min", limit=100):
+        return self.many([symbol], timeframe, limit)[symbol]
+
+    def many(self, symbols, timeframe="15Min", limit=100):
+        return self.client.get_bars(symbols, timeframe, limit)
+
+class ReplayFeed(BarFeed):
+    """
+    Serves recorded bars as if they were live: a fetch returns the last
+    `limit` bars that have opened by `clock.now()` (the last one is the
+    forming bar). Moving the VirtualClock forward replays history at any
+    speed, down to "as fast as the code runs".
+
+    Bars of a higher timeframe are served whole, so a forming HTF bar already
+    holds its full OHLC; the live code reads HTF bars with lag=1 and never
+    uses the forming one.
+
+    Parameters:
+        frames (dict): (symbol, timeframe) -> OHLCV DataFrame with a DatetimeIndex.
+        clock (VirtualClock): Defaults to a clock at the first bar.
+        delay (float): Real seconds every fetch blocks, to simulate network latency.
+        failing (set): Symbols whose fetches raise ConnectionError.
+    """
+
+    def __init__(self, frames, clock=None, delay=0.0, failing=()):
+        self.frames = {key: _prepare(df) for key, df in frames.items()}
+        if clock is None:
+            clock = VirtualClock(min(df.index[0] for df in self.frames.values()))
+        self.clock = clock
+        self.delay = delay
+        self.failing = set(failing)
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_csv(cls, files, **params):
+        """
+        Replays CSV files such as the ones data_collect.py writes, e.g.
+        {("BTC/USD", "15Min"): "BTC_LTF_15m.csv", ("BTC/USD", "1Hour"): "BTC_HTF_1h.csv"}.
+        """
+        return cls({key: pd.read_csv(path, index_col=0) for key, path in files.items()}, **params)
+
+    def __call__(self, symbol, timeframe="15Min", limit=100):
+        with self._lock:
+            self.calls.append((symbol, timeframe, limit, self.clock.now()))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.delay:
+                time.sleep(self.delay)
+            if symbol in self.failing:
+                raise ConnectionError(f"{symbol} unavailable")
+            df = self.frames[(symbol, timeframe)]
+            end = df.index.searchsorted(self.clock.now(), side="right")
+            return df.iloc[max(0, end - limit):end]
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def many(self, symbols, timeframe="15Min", limit=100):
+        """Batched fetch; failing symbols are left out of the result."""
+        return {s: self(s, timeframe, limit) for s in symbols if s not in self.failing}
+
+class SyntheticFeed(ReplayFeed):
+    """
+    ReplayFeed over generated bars: a random walk per symbol (see
+    synthetic_bars) at the LTF, resampled to the HTF.
+
+    Parameters:
+        symbols (list): Symbol names.
+        bars (int): LTF bars per symbol.
+        start (str): Timestamp of the first bar.
+        timeframe_ltf, timeframe_htf (str): Timeframes to serve.
+        seed (int): Seed of the first symbol; symbol k uses seed + k.
+    """
+
+    def __init__(self, symbols, bars=10_000, start="2024-01-01", timeframe_ltf="15Min", timeframe_htf="1Hour",
+                 seed=0, **params):
+        frames = {}
+        for k, symbol in enumerate(symbols):
+            ltf = synthetic_bars(bars, freq=timeframe_ltf, start=start, seed=seed + k)
+            frames[(symbol, timeframe_ltf)] = ltf
+            frames[(symbol, timeframe_htf)] = resample_bars(ltf, timeframe_htf)
+        super().__init__(frames, **params)
+
+def synthetic_bars(n, freq="15Min", start="2024-01-01", seed=0, drift=0.0004, volatility=0.002,
+                   regime_length=300, price=100.0, ranging_share=0.0, breakout_density=0.0):
+    """
+    Random-walk OHLCV bars with trending regimes: every `regime_length` bars
+    the drift flips sign at random, and volatility clusters in calm/normal/
+    spiky bars so breakouts and EMA crossings actually happen.
+
+    With `ranging_share` > 0 that share of the regimes is a tight, driftless
+    range instead, and `breakout_density` is the chance per ranging bar of a
+    breakout candle out of the range (large body, volume spike) in the
+    direction of the preceding trend.
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(pd.Timestamp(start, tz="UTC"), periods=n, freq=pd.Timedelta(freq))
+
+    regimes = rng.choice([-1, 1], size=n // regime_length + 1)
+    direction = np.repeat(regimes, regime_length)[:n]
+    trend = direction * drift
+    shocks = rng.normal(0, volatility, n) * rng.choice([0.3, 1, 3], size=n, p=[0.4, 0.5, 0.1])
+    high_wick = np.abs(rng.normal(0, volatility * 0.4, n))
+    low_wick = np.abs(rng.normal(0, volatility * 0.4, n))
+    volume = rng.lognormal(10, 0.6, n)
+
+    # extra draws only when asked for, so the default bars stay the same
+    if ranging_share > 0 or breakout_density > 0:
+        ranging = np.repeat(rng.random(len(regimes)) < ranging_share, regime_length)[:n]
+        breakout = ranging & (rng.random(n) < breakout_density)
+        trend = np.where(ranging, 0.0, trend)
+        shocks = np.where(ranging, shocks * 0.15, shocks)
+        high_wick = np.where(ranging, high_wick * 0.15, high_wick)
+        low_wick = np.where(ranging, low_wick * 0.15, low_wick)
+        shocks = np.where(breakout, direction * volatility * 3, shocks)
+        volume = np.where(breakout, volume * 4, volume)
+
+    close = price * np.exp(np.cumsum(trend + shocks))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + high_wick)
+    low = np.minimum(open_, close) * (1 - low_wick)
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}, index=index)
+
+def resample_bars(df, timeframe):
+    """Aggregates OHLCV bars to a higher timeframe (bars labelled by their open time)."""
+    agg = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+    return df.resample(pd.Timedelta(timeframe)).agg(agg).dropna()
+
+def run_replay(feed, symbols, start=None, end=None, step=None, **runner_params):
+    """
+    Pushes recorded or synthetic bars through the live code path (LiveRunner:
+    fetch, streaming indicators, trend bias, SignalEngine) as fast as it runs.
+
+    The first cycle at `start` warms the symbols up on the bars before it,
+    then the feed's VirtualClock jumps `step` ahead per cycle (default: one
+    LTF bar) until `end`. A larger step replays several bars per cycle
+    through the runner's catch-up path.
+
+    Returns:
+        dict: cycles, bars (processed LTF bars over all symbols), events,
+        seconds and bars_per_sec.
+    """
+    runner = LiveRunner(symbols, fetch=feed, fetch_many=feed.many, clock=feed.clock, **runner_params)
+    step = pd.Timedelta(step) if step is not None else runner.interval
+    if start is not None:
+        feed.clock.current = pd.Timestamp(start)
+    if end is None:
+        # close of the last recorded bar, so every bar gets processed
+        end = min(feed.frames[(s, runner.timeframe_ltf)].index[-1] for s in symbols) + runner.interval
+    end = pd.Timestamp(end)
+
+    events = []
+    runner.on_event = lambda symbol, event: events.append((symbol, event))
+
+    async def replay():
+        while True:
+            await runner.run_cycle()
+            if feed.clock.now() >= end:
+                break
+            feed.clock.current = min(feed.clock.now() + step, end)
+
+    started = time.perf_counter()
+    try:
+        asyncio.run(replay())
+    finally:
+        runner.io_pool.shutdown()
+        runner.cpu_pool.shutdown()
+    seconds = time.perf_counter() - started
+
+    bars = sum(worker.engine.index + 1 for worker in runner.workers.values())
+    return {
+        "cycles": runner.cycles,
+        "bars": bars,
+        "events": events,
+        "seconds": round(seconds, 3),
+        "bars_per_sec": round(bars / seconds, 1) if seconds else None,
+    }
+
+def _prepare(df):
+    df = df[[c for c in OHLCV if c in df.columns]].astype(float)
+    index = pd.DatetimeIndex(pd.to_datetime(df.index))
+    df.index = index.tz_localize("UTC") if index.tz is None else index.tz_convert("UTC")
+    return df.sort_index()
@@ -0,0 +1,204 @@
+import argparse
+import json
+import os
+import struct
+import time
+
+import numpy as np
+import pandas as pd
+
+# File layout: MAGIC, the header length (uint64, little endian), the JSON
+# header, then one fixed-width column after the other, each starting on an
+# ALIGN byte boundary: int64 epoch-ns timestamps first, then float64 columns.
+MAGIC = b"QBARS001"
+ALIGN = 64
+INDEX_DTYPE = "<i8"
+COLUMN_DTYPE = "<f8"
+
+def _aligned(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+def write_bars(df, path):
+    """
+    Writes a DatetimeIndex'ed frame of numeric columns (OHLCV, indicators)
+    as a bar file. Timestamps are stored as UTC epoch nanoseconds, every
+    column as float64. The file is replaced atomically.
+    """
+    if not isinstance(df.index, pd.DatetimeIndex):
+        raise ValueError("bar files need a DatetimeIndex")
+    non_numeric = [c for c in df.columns if not pd.api.types.is_numeric_dtype(df[c])]
+    if non_numeric:
+        raise ValueError(f"bar files only hold numeric columns, got {non_numeric}")
+
+    index = df.index if df.index.tz is not None else df.index.tz_localize("UTC")
+    timestamps = index.as_unit("ns").asi8.astype(INDEX_DTYPE, copy=False)
+    columns = [str(c) for c in df.columns]
+
+    # the header is padded to a size fixed up front (with room for the offsets' digits)
+    rows = len(df)
+    header = {
+        "rows": rows,
+        "tz": str(index.tz),
+        "index_name": df.index.name,
+        "index": {"dtype": INDEX_DTYPE, "offset": 0},
+        "columns": [{"name": c, "dtype": COLUMN_DTYPE, "offset": 0} for c in columns],
+    }
+    header_size = _aligned(len(MAGIC) + 8 + len(json.dumps(header)) + 32 * (len(columns) + 1))
+    offset = header_size
+    header["index"]["offset"] = offset
+    offset = _aligned(offset + rows * 8)
+    for column in header["columns"]:
+        column["offset"] = offset
+        offset = _aligned(offset + rows * 8)
+
+    text = json.dumps(header).encode()
+    assert len(MAGIC) + 8 + len(text) <= header_size
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(text)) + text)
+        f.write(b"\0" * (header_size - f.tell()))
+        for values, start in [(timestamps, header["index"]["offset"]),
+                              *((df[c].to_numpy(dtype=COLUMN_DTYPE), h["offset"])
+                                for c, h in zip(df.columns, header["columns"]))]:
+            f.write(b"\0" * (start - f.tell()))
+            f.write(np.ascontiguousarray(values).tobytes())
+        f.write(b"\0" * (offset - f.tell()))
+    os.replace(tmp_path, path)
+    return path
+
+def read_header(path):
+    """The JSON header of a bar file."""
+    with open(path, "rb") as f:
+        magic = f.read(len(MAGIC))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a bar file")
+        (length,) = struct.unpack("<Q", f.read(8))
+        return json.loads(f.read(length))
+
+class BarFile:
+    """
+    A bar file opened with numpy memmaps: `timestamps` and every column are
+    read-only array views onto the file, nothing is parsed or copied until
+    it is used, and the OS page cache is shared by every process reading it.
+
+        bars = BarFile("BTC_LTF_15m.bars")
+        close = bars["Close"]        # np.memmap, float64
+        df = bars.to_frame()         # DataFrame backed by the memmaps
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.header = read_header(path)
+        self.rows = self.header["rows"]
+        self.columns = [c["name"] for c in self.header["columns"]]
+        self.timestamps = self._map(self.header["index"])
+        self._columns = {c["name"]: c for c in self.header["columns"]}
+
+    def _map(self, spec):
+        if self.rows == 0:
+            return np.empty(0, dtype=spec["dtype"])
+        return np.memmap(self.path, dtype=spec["dtype"], mode="r", offset=spec["offset"], shape=(self.rows,))
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, column):
+        return self._map(self._columns[column])
+
+    @property
+    def index(self):
+        """The timestamps as a DatetimeIndex in the stored time zone."""
+        index = pd.DatetimeIndex(self.timestamps.view(np.ndarray).view("datetime64[ns]"), name=self.header["index_name"])
+        return index.tz_localize("UTC").tz_convert(self.header["tz"])
+
+    def to_frame(self, columns=None):
+        """A DataFrame of `columns` (default: all) whose columns are views of the file."""
+        columns = self.columns if columns is None else list(columns)
+        return pd.DataFrame({c: self[c].view(np.ndarray) for c in columns}, index=self.index, copy=False)
+
+def read_bars(path, columns=None):
+    """Loads a bar file as a DataFrame (memmap backed, see BarFile.to_frame)."""
+    return BarFile(path).to_frame(columns)
+
+def csv_to_bars(csv_path, path=None):
+    """Converts a bar CSV (e.g. BTC_LTF_15m.csv from data_collect) to a bar file next to it."""
+    path = path or os.path.splitext(csv_path)[0] + ".bars"
+    df = pd.read_csv(csv_path, index_col=0, float_precision="round_trip")
+    df.index = pd.to_datetime(df.index, utc=True)
+    return write_bars(df, path)
+
+def bars_to_csv(path, csv_path=None):
+    """Writes a bar file back out in the CSV layout data_collect produces."""
+    csv_path = csv_path or os.path.splitext(path)[0] + ".csv"
+    read_bars(path).to_csv(csv_path)
+    return csv_path
+
+def benchmark_load(bars=10_000_000, directory=".", seed=0, repeat=3):
+    """
+    Writes `bars` synthetic 1-minute bars as CSV and as a bar file, then
+    times loading each back into a DatetimeIndex'ed frame (best of `repeat`)
+    and reading one column's sum from the bar file.
+
+    Returns:
+        dict: Seconds per load and the file sizes in MB.
+    """
+    from bar_feed import synthetic_bars
+
+    df = synthetic_bars(bars, freq="1Min", seed=seed)
+    csv_path = os.path.join(directory, f"bench_{bars}.csv")
+    bar_path = os.path.join(directory, f"bench_{bars}.bars")
+    df.to_csv(csv_path)
+    write_bars(df, bar_path)
+
+    def best(load):
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            load()
+            times.append(time.perf_counter() - started)
+        return min(times)
+
+    def load_csv():
+        frame = pd.read_csv(csv_path, index_col=0)
+        frame.index = pd.to_datetime(frame.index, utc=True)
+        return frame
+
+    result = {
+        "bars": bars,
+        "csv_seconds": best(load_csv),
+        "bars_seconds": best(lambda: read_bars(bar_path)),
+        "bars_close_sum_seconds": best(lambda: float(BarFile(bar_path)["Close"].sum())),
+        "csv_mb": os.path.getsize(csv_path) / 2**20,
+        "bars_mb": os.path.getsize(bar_path) / 2**20,
+    }
+    os.remove(csv_path)
+    os.remove(bar_path)
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert bar CSVs to memory-mapped bar files, or benchmark loading.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    to_bars = sub.add_parser("to-bars", help="CSV -> bar file")
+    to_bars.add_argument("csv", nargs="+")
+    to_csv = sub.add_parser("to-csv", help="bar file -> CSV")
+    to_csv.add_argument("bars", nargs="+")
+    bench = sub.add_parser("bench", help="load time of a bar file vs CSV")
+    bench.add_argument("--bars", type=int, default=10_000_000)
+    bench.add_argument("--dir", default=".")
+    bench.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if args.command == "to-bars":
+        for path in args.csv:
+            print(f"✅ {path} -> {csv_to_bars(path)}")
+    elif args.command == "to-csv":
+        for path in args.bars:
+            print(f"✅ {path} -> {bars_to_csv(path)}")
+    else:
+        r = benchmark_load(args.bars, args.dir, repeat=args.repeat)
+        print(f"⏱️ {r['bars']:,} bars | CSV {r['csv_seconds']:.2f}s ({r['csv_mb']:.0f} MB) | "
+              f"bar file {r['bars_seconds']:.4f}s ({r['bars_mb']:.0f} MB) | "
+              f"Close sum from bar file {r['bars_close_sum_seconds']:.4f}s")
+
+if __name__ == "__main__":
+    main()
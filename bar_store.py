@@ -0,0 +1,315 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+def flatten_columns(df):
+    """Flattens yfinance MultiIndex columns to 'Open', 'High', ... names."""
+    df.columns = [col[0].title() if isinstance(col, tuple) else col.title() for col in df.columns]
+    return df
+
+def period_to_offset(period):
+    """Converts a yfinance period string ('60d', '6mo', '1y', '2wk') to a pandas offset."""
+    units = [("mo", "months"), ("wk", "weeks"), ("d", "days"), ("y", "years")]
+    for suffix, unit in units:
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+    raise ValueError(f"Unsupported period: {period}")
+
+def interval_to_timedelta(interval):
+    """Converts a yfinance interval string ('15m', '1h', '1d', '1wk') to a Timedelta."""
+    units = [("wk", "W"), ("m", "min"), ("h", "h"), ("d", "D")]
+    for suffix, unit in units:
+        if interval.endswith(suffix) and interval[:-len(suffix)].isdigit():
+            return pd.Timedelta(int(interval[:-len(suffix)]), unit=unit)
+    raise ValueError(f"Unsupported interval: {interval}")
+
+# How far back Yahoo serves intraday bars; older start dates make the whole request fail
+YAHOO_HISTORY_LIMITS = {"1m": pd.Timedelta(days=7), "60m": pd.Timedelta(days=730), "1h": pd.Timedelta(days=730)}
+YAHOO_INTRADAY_LIMIT = pd.Timedelta(days=60)
+
+def yahoo_history_start(interval, now=None):
+    """Earliest start Yahoo accepts for `interval` (None for daily and longer bars)."""
+    step = interval_to_timedelta(interval)
+    if step >= pd.Timedelta(days=1):
+        return None
+    limit = YAHOO_HISTORY_LIMITS.get(interval, YAHOO_INTRADAY_LIMIT)
+    now = pd.Timestamp.now(tz="UTC") if now is None else now
+    # a little inside the limit, a start right at it is still rejected
+    return now - limit + pd.Timedelta(hours=1)
+
+def yahoo_downloader(symbol, interval, start, end):
+    """
+    Default downloader: fetches [start, end) from Yahoo Finance, with `start`
+    clamped to the history Yahoo serves for intraday intervals.
+    """
+    import yfinance as yf
+
+    earliest = yahoo_history_start(interval)
+    if earliest is not None and start < earliest:
+        start = earliest
+    if start >= end:
+        return pd.DataFrame()
+    df = yf.download(symbol, interval=interval, start=start, end=end, auto_adjust=False, progress=False)
+    return flatten_columns(df)
+
+# lets BarStore skip the part of a request the downloader cannot serve
+yahoo_downloader.history_start = yahoo_history_start
+
+class FileDownloader:
+    """
+    Stand-in downloader that serves bars from local CSV files instead of Yahoo,
+    e.g. the files written by data_collect.py.
+
+    Parameters:
+        pattern (str): Path with {symbol} and {interval} placeholders,
+            e.g. "data/{symbol}_{interval}.csv".
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.calls = []
+
+    def __call__(self, symbol, interval, start, end):
+        self.calls.append((symbol, interval, start, end))
+        df = pd.read_csv(self.pattern.format(symbol=symbol, interval=interval), index_col=0)
+        df.index = _to_utc(pd.to_datetime(df.index))
+        return df[(df.index >= start) & (df.index < end)]
+
+@contextmanager
+def file_lock(path):
+    """Exclusive lock on `path` (created if missing) across processes; the OS drops it if the holder dies."""
+    with open(path, "a+") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after 10 seconds
+                    time.sleep(0.1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _to_utc(index):
+    return index.tz_localize("UTC") if index.tz is None else index.tz_convert("UTC")
+
+class BarStore:
+    """
+    On-disk OHLCV cache partitioned by symbol/interval/day:
+
+        <root>/<symbol>/<interval>/<YYYY-MM-DD>.parquet
+
+    Each symbol/interval keeps the time range it has already fetched, so a read
+    only downloads the part of the requested period that is missing and a fully
+    covered read never touches the network.
+
+    Updates and writes of one symbol/interval hold a file lock
+    (<interval>/_lock), so processes sharing a store (ab_test's sweep pool)
+    never merge partitions or coverage over each other; a second process
+    asking for the same bars waits and then finds them covered.
+
+    Parameters:
+        root (str): Directory of the store.
+        downloader (callable): (symbol, interval, start, end) -> DataFrame with a
+            DatetimeIndex and OHLCV columns. Defaults to Yahoo Finance.
+    """
+
+    def __init__(self, root="bar_cache", downloader=yahoo_downloader):
+        self.root = root
+        self.downloader = downloader
+
+    def get(self, symbol, interval, period, end=None):
+        """Returns the bars of the last `period` before `end` (default: now), fetching only what is missing."""
+        end = pd.Timestamp.now(tz="UTC") if end is None else _to_utc(pd.DatetimeIndex([end]))[0]
+        start = end - period_to_offset(period)
+        self.update(symbol, interval, start, end)
+        return self.read(symbol, interval, start, end)
+
+    def update(self, symbol, interval, start, end):
+        """
+        Downloads and stores the parts of [start, end) that are not covered
+        yet. Coverage only grows by the span of the bars actually returned.
+        """
+        with self._lock(symbol, interval):
+            self._update(symbol, interval, start, end)
+
+    def _update(self, symbol, interval, start, end):
+        covered = self._coverage(symbol, interval)
+        step = interval_to_timedelta(interval)
+        history_start = getattr(self.downloader, "history_start", None)
+        earliest = history_start(interval) if history_start is not None else None
+        if earliest is not None and start < earliest:
+            start = earliest
+
+        if covered is None:
+            missing = [(start, end)]
+        else:
+            missing = []
+            if start < covered[0]:
+                missing.append((start, covered[0]))
+            # the last stored bar may still have been forming, so fetch it again
+            if end - covered[1] >= step:
+                missing.append((covered[1] - step, end))
+
+        new_start, new_end = covered if covered is not None else (None, None)
+        for fetch_start, fetch_end in missing:
+            if fetch_start >= fetch_end:
+                continue
+            print(f"\U0001F4E5 Downloading {symbol} {interval} {fetch_start} → {fetch_end}...")
+            df = self.downloader(symbol, interval, fetch_start, fetch_end)
+            if df is None or df.empty:
+                # yfinance returns an empty frame on errors and rate limits: leave
+                # the range uncovered so the next read tries again
+                print(f"⚠️ No {symbol} {interval} bars for {fetch_start} → {fetch_end}")
+                continue
+            self._write(symbol, interval, df)
+
+            # coverage only grows by the span the returned bars actually have (no
+            # bar can start less than one interval before the first one)
+            index = _to_utc(pd.DatetimeIndex(df.index))
+            first, last = max(fetch_start, index.min() - step), index.max() + step
+            new_start = first if new_start is None else min(new_start, first)
+            new_end = last if new_end is None else max(new_end, last)
+
+        if new_start is not None and (new_start, new_end) != covered:
+            self._set_coverage(symbol, interval, new_start, new_end)
+
+    def read(self, symbol, interval, start, end):
+        """Loads the stored bars in [start, end) without any network access."""
+        directory = self._directory(symbol, interval)
+        days = pd.date_range(start.normalize(), end.normalize(), freq="D")
+        paths = [os.path.join(directory, f"{day.date()}.parquet") for day in days]
+        frames = [pd.read_parquet(path) for path in paths if os.path.exists(path)]
+        if not frames:
+            return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Adj Close", "Volume"])
+
+        df = pd.concat(frames)
+        return df[(df.index >= start) & (df.index < end)]
+
+    def write(self, symbol, interval, df):
+        """Merges bars into their day partitions; newer rows win on duplicate timestamps."""
+        if df is None or df.empty:
+            return
+        with self._lock(symbol, interval):
+            self._write(symbol, interval, df)
+
+    def _write(self, symbol, interval, df):
+        directory = self._directory(symbol, interval)
+        os.makedirs(directory, exist_ok=True)
+
+        df = df.copy()
+        df.index = _to_utc(pd.DatetimeIndex(df.index))
+        for day, part in df.groupby(df.index.normalize()):
+            path = os.path.join(directory, f"{day.date()}.parquet")
+            if os.path.exists(path):
+                part = pd.concat([pd.read_parquet(path), part])
+                part = part[~part.index.duplicated(keep="last")]
+            # write then rename, so concurrent readers never see a half-written partition
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            part.sort_index().to_parquet(tmp_path)
+            os.replace(tmp_path, path)
+
+    def _directory(self, symbol, interval):
+        return os.path.join(self.root, symbol.replace("/", "_"), interval)
+
+    def _lock(self, symbol, interval):
+        directory = self._directory(symbol, interval)
+        os.makedirs(directory, exist_ok=True)
+        return file_lock(os.path.join(directory, "_lock"))
+
+    def _coverage(self, symbol, interval):
+        path = os.path.join(self._directory(symbol, interval), "_coverage.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            meta = json.load(f)
+        return pd.Timestamp(meta["start"]), pd.Timestamp(meta["end"])
+
+    def _set_coverage(self, symbol, interval, start, end):
+        directory = self._directory(symbol, interval)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, "_coverage.json")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"start": start.isoformat(), "end": end.isoformat()}, f)
+        os.replace(tmp_path, path)
+
+def download_crypto_data(symbol: str,
+                          ltf_interval: str = '15m', ltf_period: str = '60d',
+                          htf_interval: str = '1h', htf_period: str = '6mo',
+                          store: BarStore = None, resample_htf: bool = None):
+    """
+    Downloads cryptocurrency price data from Yahoo Finance for two different timeframes.
+
+    Parameters:
+        symbol (str): The ticker symbol of the cryptocurrency (e.g., 'BTC-USD').
+        ltf_interval (str): Interval for the low time frame data (default '15m').
+        ltf_period (str): Period for the low time frame data (default '60d').
+        htf_interval (str): Interval for the high time frame data (default '1h').
+        htf_period (str): Period for the high time frame data (default '6mo').
+        store (BarStore): Optional local bar cache; only bars missing from it are downloaded.
+        resample_htf (bool): Build the HTF bars from the LTF bars where they overlap
+            (see timeframes.resampled_htf) and only download the HTF history
+            before them. The HTF frame then has a bool `complete` column.
+            None (default) resamples only 24/7 markets like crypto: for
+            session markets Yahoo's own HTF bars (e.g. daily bars labelled
+            at New York midnight) do not line up with resampled ones.
+
+    Returns:
+        tuple: DataFrames for low time frame (ltf) and high time frame (htf) price data.
+    """
+    from timeframes import has_sessions, resampled_htf
+
+    multiple = interval_to_timedelta(htf_interval) % interval_to_timedelta(ltf_interval) == pd.Timedelta(0)
+
+    def resample(ltf):
+        if resample_htf is False or not multiple or len(ltf) < 2:
+            return False
+        if resample_htf is None and has_sessions(pd.DatetimeIndex(ltf.index)):
+            return False
+        ltf.index = _to_utc(pd.DatetimeIndex(ltf.index))
+        return True
+
+    if store is not None:
+        ltf = store.get(symbol, ltf_interval, ltf_period)
+        if not resample(ltf):
+            return ltf, store.get(symbol, htf_interval, htf_period)
+
+        def fetch(start, end):
+            store.update(symbol, htf_interval, start, end)
+            return store.read(symbol, htf_interval, start, end)
+    else:
+        import yfinance as yf
+
+        print(f"\U0001F4E5 Downloading {symbol} data...")
+
+        # Download low time frame (ltf) data
+        ltf = flatten_columns(yf.download(symbol, interval=ltf_interval, period=ltf_period, auto_adjust=False))
+        if not resample(ltf):
+            # Download high time frame (htf) data
+            htf = yf.download(symbol, interval=htf_interval, period=htf_period, auto_adjust=False)
+            return ltf, flatten_columns(htf)
+
+        def fetch(start, end):
+            print(f"\U0001F4E5 Downloading {symbol} {htf_interval} {start} → {end}...")
+            return yahoo_downloader(symbol, htf_interval, start, end)
+
+    htf_start = ltf.index[-1] + interval_to_timedelta(ltf_interval) - period_to_offset(htf_period)
+    return ltf, resampled_htf(ltf, htf_interval, htf_start, fetch)
@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+import platform
+import time
+
+import numpy as np
+import pandas as pd
+
+from bar_feed import synthetic_bars, resample_bars
+from pipeline import STAGES, Pipeline
+
+SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+BASELINE_PATH = "benchmark_baseline.json"
+
+def make_dataset(bars, seed=0, ranging_share=0.5, breakout_density=0.02, freq="15Min", htf="1Hour"):
+    """Seeded synthetic LTF bars (trending and ranging regimes) and their HTF resample."""
+    ltf = synthetic_bars(bars, freq=freq, seed=seed, ranging_share=ranging_share, breakout_density=breakout_density)
+    return ltf, resample_bars(ltf, htf)
+
+def bench_variant(ltf_df, htf_df, variant, repeat=3, track_memory=True):
+    """
+    Times every stage of one variant `repeat` times (best run counts) and,
+    in one extra run under tracemalloc, records the peak memory per stage.
+
+    Returns:
+        list: One dict per stage with seconds, peak_mb, rows, breakouts and entries.
+    """
+    timings = {stage: [] for stage in STAGES}
+    result = None
+    for _ in range(repeat):
+        pipeline = Pipeline(variant, copy=True, track_memory=False)
+        result = pipeline.run(ltf_df, htf_df)
+        for entry in pipeline.report:
+            timings[entry["stage"]].append(entry["seconds"])
+
+    peaks = {}
+    if track_memory:
+        pipeline = Pipeline(variant, copy=True, track_memory=True)
+        pipeline.run(ltf_df, htf_df)
+        peaks = {entry["stage"]: entry["peak_mb"] for entry in pipeline.report}
+
+    return [
+        {
+            "stage": stage,
+            "seconds": min(timings[stage]),
+            "peak_mb": peaks.get(stage),
+            "rows": len(result),
+            "breakouts": int(result["is_breakout"].sum()),
+            "entries": int(result["is_entry"].sum()),
+        }
+        for stage in STAGES
+    ]
+
+def run_benchmarks(sizes=SIZES, variants=("A", "B"), repeat=3, seed=0, track_memory=True, **dataset_params):
+    """Benchmarks every variant at every size; returns a JSON-ready dict."""
+    results = []
+    for bars in sizes:
+        ltf_df, htf_df = make_dataset(bars, seed=seed, **dataset_params)
+        for variant in variants:
+            started = time.perf_counter()
+            for row in bench_variant(ltf_df, htf_df, variant, repeat=repeat, track_memory=track_memory):
+                results.append({"variant": variant, "bars": bars, **row})
+            print(f"⏱️ {variant} | {bars:,} bars | {time.perf_counter() - started:.1f}s")
+
+    return {
+        "meta": {
+            "created": pd.Timestamp.now(tz="UTC").isoformat(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "repeat": repeat,
+            "seed": seed,
+            "dataset": dataset_params,
+        },
+        "results": results,
+    }
+
+def compare_to_baseline(current, baseline, threshold_pct=20.0, min_seconds=0.005):
+    """
+    Flags every (variant, bars, stage) that got more than `threshold_pct`
+    slower than in `baseline`. Stages faster than `min_seconds` in the
+    baseline are skipped, their timings are mostly noise.
+
+    Returns:
+        list: One dict per regression, worst first.
+    """
+    reference = {(r["variant"], r["bars"], r["stage"]): r["seconds"] for r in baseline["results"]}
+    regressions = []
+    for row in current["results"]:
+        before = reference.get((row["variant"], row["bars"], row["stage"]))
+        if before is None or before < min_seconds:
+            continue
+        change = (row["seconds"] - before) / before * 100
+        if change > threshold_pct:
+            regressions.append({
+                "variant": row["variant"], "bars": row["bars"], "stage": row["stage"],
+                "baseline_seconds": before, "seconds": row["seconds"], "change_pct": round(change, 1),
+            })
+    return sorted(regressions, key=lambda r: -r["change_pct"])
+
+def results_table(current):
+    """Seconds per stage (rows) for every variant/size (columns)."""
+    df = pd.DataFrame(current["results"])
+    return df.pivot_table(index="stage", columns=["variant", "bars"], values="seconds").reindex(STAGES)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stage-level benchmarks of the A/B backtest pipeline.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES[:2])
+    parser.add_argument("--variants", nargs="+", default=["A", "B"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ranging-share", type=float, default=0.5)
+    parser.add_argument("--breakout-density", type=float, default=0.02)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--out", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=20.0, help="allowed slowdown in percent")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(
+        args.sizes, args.variants, repeat=args.repeat, seed=args.seed, track_memory=not args.no_memory,
+        ranging_share=args.ranging_share, breakout_density=args.breakout_density,
+    )
+    with open(args.out, "w") as f:
+        json.dump(current, f, indent=2)
+    print(results_table(current).round(4).to_string())
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"📌 Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare_to_baseline(current, baseline, args.threshold)
+    for r in regressions:
+        print(f"❌ {r['variant']} | {r['bars']:,} bars | {r['stage']}: "
+              f"{r['baseline_seconds']:.4f}s → {r['seconds']:.4f}s (+{r['change_pct']}%)")
+    if not regressions:
+        print(f"✅ No stage more than {args.threshold}% slower than the baseline")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
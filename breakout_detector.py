@@ -1,40 +1,86 @@
-def detect_breakouts(df, range_window=10, range_pct=0.005, vol_multiplier=1.5, rsi_threshold=60):
-    df = df.copy()
-    df['is_breakout'] = False
-
-    for i in range(range_window, len(df)):
-        window = df.iloc[i - range_window:i]
-        candle= df.iloc[i]
-
-        if candle['trend_bias'] not in ['bullish', 'bearish']:
-            continue
-
-        max_high = window['High'].max()
-        min_low = window['Low'].min()
-        range_size = max_high - min_low
-        mid_price = (max_high + min_low) / 2
-        if range_size / mid_price > range_pct:
-            continue
-
-        body = abs(candle["Close"] - candle['Open'])
-        median_body = window['Close'].sub(window["Open"]).abs().median()
-        if body < 1.5 * median_body:
-            continue
-
-        # Directional breakout (based on trend)
-        if candle["trend_bias"] == "bullish" and candle["Close"] <= max_high:
-            continue
-        if candle["trend_bias"] == "bearish" and candle["Close"] >= min_low:
-            continue
-
-        # Volume & momentum
-        if candle["Volume"] < vol_multiplier * candle["vol_avg_20"]:
-            continue
-        if candle["trend_bias"] == "bullish" and candle["rsi"] < rsi_threshold:
-            continue
-        if candle["trend_bias"] == "bearish" and candle["rsi"] > (100 - rsi_threshold):
-            continue
-
-        df.at[df.index[i], "is_breakout"] = True
+import numpy as np
+import pandas as pd
 
+def prior_rolling(values, window, how):
+    """Rolling max/min/median of the `window` values *before* each position (NaN until the window is full)."""
+    return getattr(pd.Series(values).rolling(window), how)().shift(1).to_numpy()
+
+def breakout_features(df):
+    """Extracts the arrays the breakout rules read, so they can be reused across parameter sets."""
+    bias = df["trend_bias"].to_numpy()
+    open_ = df["Open"].to_numpy(dtype=float)
+    close = df["Close"].to_numpy(dtype=float)
+    return {
+        "high": df["High"].to_numpy(dtype=float),
+        "low": df["Low"].to_numpy(dtype=float),
+        "close": close,
+        "body": np.abs(close - open_),
+        "volume": df["Volume"].to_numpy(dtype=float),
+        "vol_avg": df["vol_avg_20"].to_numpy(dtype=float),
+        "rsi": df["rsi"].to_numpy(dtype=float),
+        "bullish": bias == "bullish",
+        "bearish": bias == "bearish",
+    }
+
+def breakout_mask_from_features(features, range_window=10, range_pct=0.005, vol_multiplier=1.5, rsi_threshold=60,
+                                max_high=None, min_low=None, median_body=None):
+    """
+    Evaluates the breakout rules on precomputed features. The rolling range
+    statistics can be passed in (see prior_rolling) when they are shared by
+    several parameter sets; missing ones are computed here.
+    """
+    n = len(features["close"])
+    if n <= range_window:
+        return np.zeros(n, dtype=bool)
+
+    close, body = features["close"], features["body"]
+    bullish, bearish = features["bullish"], features["bearish"]
+    rsi = features["rsi"]
+    if max_high is None:
+        max_high = prior_rolling(features["high"], range_window, "max")
+    if min_low is None:
+        min_low = prior_rolling(features["low"], range_window, "min")
+
+    # Each rule rejects a candle; NaN comparisons are False, so missing
+    # indicators let a candle through exactly like the loop did.
+    with np.errstate(invalid="ignore", divide="ignore"):
+        wide_range = (max_high - min_low) / ((max_high + min_low) / 2) > range_pct
+        no_break = (bullish & (close <= max_high)) | (bearish & (close >= min_low))
+        low_volume = features["volume"] < vol_multiplier * features["vol_avg"]
+        weak_rsi = (bullish & (rsi < rsi_threshold)) | (bearish & (rsi > (100 - rsi_threshold)))
+
+    mask = (bullish | bearish) & ~(wide_range | no_break | low_volume | weak_rsi)
+    mask[:range_window] = False
+
+    # The rolling median is the expensive statistic, so unless it was passed
+    # in, only evaluate it on the few candles that survived the cheap rules.
+    candidates = np.flatnonzero(mask)
+    if len(candidates):
+        if median_body is None:
+            windows = np.lib.stride_tricks.sliding_window_view(body, range_window)
+            candidate_median = np.median(windows[candidates - range_window], axis=1)
+        else:
+            candidate_median = median_body[candidates]
+        with np.errstate(invalid="ignore"):
+            mask[candidates[body[candidates] < 1.5 * candidate_median]] = False
+
+    return mask
+
+def breakout_mask(df, range_window=10, range_pct=0.005, vol_multiplier=1.5, rsi_threshold=60):
+    """
+    Evaluates the breakout rules for every candle at once.
+
+    The range statistics (max High, min Low, median body) are rolled over the
+    `range_window` candles *before* each bar, so the result matches the old
+    per-bar `df.iloc[i - range_window:i]` scan.
+
+    Returns:
+        np.ndarray: Boolean mask, True where the candle is a breakout.
+    """
+    return breakout_mask_from_features(breakout_features(df), range_window, range_pct, vol_multiplier, rsi_threshold)
+
+def detect_breakouts(df, range_window=10, range_pct=0.005, vol_multiplier=1.5, rsi_threshold=60, copy=True):
+    if copy:
+        df = df.copy()
+    df['is_breakout'] = breakout_mask(df, range_window, range_pct, vol_multiplier, rsi_threshold)
     return df
@@ -0,0 +1,274 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import jit_kernels
+from a_backtest import add_indicators
+from pipeline import STAGES, STAGE_FUNCS, VARIANTS, Pipeline, resolve_params
+from param_sweep import STRUCTURE_LOOKBACK
+
+# Stages that only read their own bars plus a bounded halo around them
+SIGNAL_STAGES = ["breakouts", "ote", "entries", "risk_reward", "backtest"]
+
+class ChunkedIndicators:
+    """
+    add_indicators over a series fed in consecutive chunks, bit-identical to
+    one call on the whole series: every recursion (EMA, RSI, ATR, the
+    running sum behind the rolling volume mean) carries its state from one
+    chunk to the next instead of warming up again.
+
+    Parameters:
+        ema_windows (tuple): EMA windows, one `ema_<window>` column each.
+        atr_window, rsi_window (int): Windows of ATR and RSI.
+        volume_window (int): Window of the `vol_avg_<window>` column.
+    """
+
+    def __init__(self, ema_windows=(50, 200), atr_window=14, rsi_window=14, volume_window=20):
+        self.ema_windows = ema_windows
+        self.atr_window = atr_window
+        self.rsi_window = rsi_window
+        self.volume_window = volume_window
+        self.count = 0
+        self.prev_close = None
+        self.ema = {}
+        self.atr = None
+        self.volume_tail = np.empty(0)
+        self.volume_state = None
+
+    def update(self, df):
+        """Adds the indicator columns to the next chunk (in place) and returns it."""
+        if self.count == 0 and len(df) < max(*self.ema_windows, self.atr_window, self.rsi_window, self.volume_window):
+            raise ValueError("the first chunk must cover the longest indicator window")
+
+        close = df["Close"].astype(float)
+        for window in self.ema_windows:
+            df[f"ema_{window}"] = self._ewm(close, f"ema_{window}", window, span=window)
+
+        df["atr"] = self._atr(df)
+
+        # ta's RSI: ewm of the up/down moves, the first move of the series is 0
+        closes = close if self.prev_close is None else pd.concat([pd.Series([self.prev_close]), close])
+        diff = closes.diff(1)
+        up = diff.where(diff > 0, 0.0)
+        down = -diff.where(diff < 0, 0.0)
+        if self.prev_close is not None:
+            up, down = up.iloc[1:], down.iloc[1:]
+        up = self._ewm(up, "rsi_up", self.rsi_window, alpha=1 / self.rsi_window)
+        down = self._ewm(down, "rsi_down", self.rsi_window, alpha=1 / self.rsi_window)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            df["rsi"] = np.where(down == 0, 100, 100 - (100 / (1 + up / down)))
+
+        df[f"vol_avg_{self.volume_window}"] = self._volume_mean(df["Volume"].to_numpy(dtype=float))
+
+        self.prev_close = float(close.iloc[-1])
+        self.count += len(df)
+        return df
+
+    def _ewm(self, values, name, window, **params):
+        # the last smoothed value, put in front of the chunk, continues pandas' recursion exactly
+        values = values.to_numpy(dtype=float)
+        previous = self.ema.get(name)
+        if previous is not None:
+            values = np.r_[previous, values]
+        smoothed = pd.Series(values).ewm(adjust=False, **params).mean().to_numpy()
+        if previous is not None:
+            smoothed = smoothed[1:]
+        self.ema[name] = smoothed[-1]
+        # NaN until `window` bars were seen, like ta's min_periods
+        warmup = window - 1 - self.count
+        if warmup > 0:
+            smoothed = smoothed.copy()
+            smoothed[:warmup] = np.nan
+        return smoothed
+
+    def _atr(self, df):
+        window = self.atr_window
+        high = df["High"].to_numpy(dtype=float)
+        low = df["Low"].to_numpy(dtype=float)
+        prev_close = np.r_[np.nan if self.prev_close is None else self.prev_close, df["Close"].to_numpy(dtype=float)[:-1]]
+        true_range = pd.DataFrame({
+            "tr1": high - low, "tr2": np.abs(high - prev_close), "tr3": np.abs(low - prev_close),
+        }).max(axis=1).to_numpy()
+
+        out = np.zeros(len(df))
+        start = 0
+        if self.count == 0:
+            # ta seeds the recursion with the mean of the first `window` true ranges
+            self.atr = pd.Series(true_range[0:window]).mean()
+            out[window - 1] = self.atr
+            start = window
+        out[start:] = jit_kernels.wilder_atr_loop(true_range[start:], window, self.atr)
+        if len(out) > start:
+            self.atr = out[-1]
+        return out
+
+    def _volume_mean(self, volume):
+        if self.volume_state is None:
+            self.volume_state = jit_kernels.rolling_mean_state(volume[0])
+        out = jit_kernels.rolling_mean_loop(volume, self.volume_window, self.volume_tail, self.volume_state)
+        self.volume_tail = np.r_[self.volume_tail, volume][-self.volume_window:]
+        return out
+
+class ChunkedBacktest:
+    """
+    Runs a strategy variant over bars streamed in chunks (e.g. years of
+    1-minute history read from disk) with the same breakouts, entries and
+    trades as Pipeline(variant).run on the whole series.
+
+    Indicators carry their state across chunks (ChunkedIndicators). The
+    signal stages then run on each chunk plus two halos:
+
+        back:    max(max_wait, carry) + max(range_window, lookback) bars, and
+                 at least the structure look-back, so every breakout, zone
+                 and carried direction an entry can reach is complete;
+        forward: max(max_holding, structure look-ahead) bars, so exits and
+                 the TP2 cap see the same bars as in one run.
+
+    Rows are emitted once their forward halo has arrived, so memory is
+    bounded by chunk_size plus the halos, not by the length of the history.
+    The HTF bars (a fraction of the LTF rows) are kept in memory.
+
+    Parameters:
+        variant (str): Pipeline variant, "A" or "B".
+        params (dict): Stage parameter overrides, as for Pipeline.
+    """
+
+    def __init__(self, variant="A", params=None):
+        self.params = resolve_params(VARIANTS[variant])
+        for stage, overrides in (params or {}).items():
+            self.params[stage].update(overrides)
+        self.back, self.forward = self.halos(self.params)
+
+    @staticmethod
+    def halos(params):
+        """(back, forward) halo lengths in bars for resolved stage parameters."""
+        breakouts, entries = params["breakouts"], params["entries"]
+        back = (max(entries.get("max_wait", 10), entries.get("carry", 10))
+                + max(breakouts.get("range_window", 10), params["ote"].get("lookback", 10)) + 1)
+        back = max(back, STRUCTURE_LOOKBACK + 1)
+        forward = max(params["backtest"].get("max_holding", 20), STRUCTURE_LOOKBACK)
+        return back, forward
+
+    def run(self, chunks, htf_df):
+        """
+        Yields the result rows chunk by chunk, in order. `chunks` is any
+        iterable of consecutive OHLCV frames (see read_bar_chunks).
+        """
+        htf_df = add_indicators(htf_df.copy())
+        indicators = ChunkedIndicators()
+        buffer = None      # halo rows already emitted + rows waiting for their forward halo
+        emitted = 0        # rows of `buffer` that were already emitted
+        offset = 0         # global position of buffer row 0
+
+        for chunk in chunks:
+            chunk = indicators.update(chunk.copy())
+            chunk = STAGE_FUNCS["trend_bias"](chunk, htf_df, **self.params["trend_bias"])
+            buffer = chunk if buffer is None else pd.concat([buffer, chunk])
+
+            ready = len(buffer) - self.forward
+            if ready > emitted:
+                yield signal_stages(buffer, self.params, offset).iloc[emitted:ready]
+                # keep the back halo of the next rows to emit
+                drop = max(0, ready - self.back)
+                buffer = buffer.iloc[drop:]
+                offset += drop
+                emitted = ready - drop
+
+        if buffer is not None and len(buffer) > emitted:
+            yield signal_stages(buffer, self.params, offset).iloc[emitted:]
+
+def signal_stages(df, params, offset=0):
+    """
+    Runs SIGNAL_STAGES over a window of a series that already has its
+    indicators and trend_bias; `offset` is the global position of the
+    window's first row.
+    """
+    df = df.copy()
+    for stage in SIGNAL_STAGES:
+        stage_params = params[stage]
+        if stage == "risk_reward" and stage_params.get("method", "structure") == "structure":
+            # the indicators' ATR is the series A's stage would recompute from the window start
+            stage_params = {**stage_params, "atr": df["atr"]}
+        df = STAGE_FUNCS[stage](df, None, **stage_params)
+
+    # entry_from_breakout_idx is positional, make it global
+    source = df["entry_from_breakout_idx"].to_numpy()
+    df["entry_from_breakout_idx"] = np.where(source >= 0, source + offset, source)
+    return df
+
+def read_bar_chunks(path, chunk_size=500_000):
+    """Streams a bar CSV (timestamp index + OHLCV) in frames of `chunk_size` rows."""
+    for chunk in pd.read_csv(path, index_col=0, chunksize=chunk_size):
+        chunk.index = pd.to_datetime(chunk.index)
+        yield chunk
+
+def run_chunked_backtest(chunks, htf_df, variant="A", params=None, symbol="", ltf_period="", htf_period="",
+                         on_chunk=None):
+    """
+    Chunked backtest of one variant, returning ab_test.summarize_backtest's
+    summary. Only the entry rows are kept; `on_chunk(frame)` gets every
+    result chunk, e.g. to append it to a file.
+    """
+    from ab_test import summarize_backtest
+
+    breakouts = 0
+    entries = []
+    for frame in ChunkedBacktest(variant, params).run(chunks, htf_df):
+        breakouts += int(frame["is_breakout"].sum())
+        entries.append(frame[frame["is_entry"] == True])
+        if on_chunk is not None:
+            on_chunk(frame)
+
+    summary = summarize_backtest(pd.concat(entries), symbol, variant, ltf_period, htf_period)
+    summary["total_breakouts"] = breakouts
+    return summary
+
+def shard_bounds(length, shards, back, forward):
+    """
+    Splits `length` rows into `shards` consecutive shards. Returns
+    (start, stop, window_start, window_stop) per shard: the rows it owns and
+    the rows it reads, the owned ones plus the halos.
+    """
+    edges = np.linspace(0, length, max(1, shards) + 1).astype(int)
+    return [
+        (start, stop, max(0, start - back), min(length, stop + forward))
+        for start, stop in zip(edges[:-1], edges[1:]) if stop > start
+    ]
+
+def _run_shard(window, params, window_start, start, stop):
+    return signal_stages(window, params, window_start).iloc[start - window_start:stop - window_start]
+
+def run_sharded_backtest(ltf_df, htf_df, variant="A", params=None, shards=None, max_workers=None):
+    """
+    Pipeline(variant).run split over time shards on a process pool, for one
+    long series (e.g. years of 1-minute bars) to use every core.
+
+    Indicators and trend bias run once over the whole series (they are
+    recursive and cheap); the signal and exit stages run per shard on the
+    shard plus the halos of ChunkedBacktest.halos. Halo rows are computed by
+    two shards but every row is taken from the one shard that owns it, so
+    the stitched frame equals the serial run exactly.
+
+    Parameters:
+        shards (int): Number of shards (default: max_workers or all cores).
+        max_workers (int): Pool size (default: all cores); 1 runs the shards
+            in this process.
+
+    Returns:
+        pd.DataFrame: The same frame as Pipeline(variant, params).run.
+    """
+    pipeline = Pipeline(variant, params, copy=True, track_memory=False)
+    df = pipeline.run(ltf_df, htf_df, stages=STAGES[:STAGES.index("trend_bias") + 1])
+    back, forward = ChunkedBacktest.halos(pipeline.params)
+    max_workers = max_workers or os.cpu_count()
+    bounds = shard_bounds(len(df), shards or max_workers, back, forward)
+
+    jobs = [(df.iloc[lo:hi], pipeline.params, lo, start, stop) for start, stop, lo, hi in bounds]
+    if max_workers == 1 or len(jobs) == 1:
+        parts = [_run_shard(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            parts = list(pool.map(_run_shard, *zip(*jobs)))
+    return pd.concat(parts)
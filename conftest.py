@@ -0,0 +1,9 @@
+import pytest
+
+from bar_feed import synthetic_bars, resample_bars
+
+@pytest.fixture(scope="session")
+def bars():
+    """20k synthetic 15-minute bars with frequent breakouts, and their 1-hour bars."""
+    ltf = synthetic_bars(20_000, seed=0, ranging_share=0.5, breakout_density=0.02)
+    return ltf, resample_bars(ltf, "1Hour")
@@ -2,6 +2,8 @@ import yfinance as yf
 import pandas as pd
 import ta
 
+from bar_format import write_bars
+
 # === Download data ===
 print("📥 Downloading BTC-USD data...")
 ltf = yf.download('BTC-USD', interval='15m', period='60d', auto_adjust=False)
@@ -39,3 +41,7 @@ htf = add_indicators(htf).dropna()
 # === Save to CSV ===
 ltf.to_csv('BTC_LTF_15m.csv')
 htf.to_csv('BTC_HTF_1h.csv')
+
+# === Save as memory-mapped bar files (see bar_format.read_bars) ===
+write_bars(ltf, 'BTC_LTF_15m.bars')
+write_bars(htf, 'BTC_HTF_1h.bars')
@@ -1,40 +1,118 @@
-import pandas as pd
+import numpy as np
 
-def detect_entry_signals(df, max_wait=10):
+import jit_kernels
+
+# "overlap": the candle's High/Low range overlaps the OTE zone (A/B backtests)
+# "close":   the wick reaches the zone and the candle closes back past ote_start
+TOUCH_MODES = ("overlap", "close")
+
+def first_touch(high, low, close, breakouts, bullish, ote_start, ote_end, max_wait=10, touch="close", backend=None):
+    """
+    Array kernel behind first_touch_entries.
+
+    Parameters:
+        high, low, close (np.ndarray): Price arrays of the whole series.
+        breakouts (np.ndarray): Ascending positions of the breakouts with a zone.
+        bullish (np.ndarray): Per breakout, True for bullish and False for bearish zones.
+        ote_start, ote_end (np.ndarray): Zone bounds per breakout.
+        backend (str): Kernel backend (see jit_kernels), None for the default.
+
+    Returns:
+        tuple: (entry_pos, breakout_pos) integer arrays, sorted by entry_pos.
+    """
+    if touch not in TOUCH_MODES:
+        raise ValueError(f"touch must be one of {TOUCH_MODES}, got {touch!r}")
+
+    n = len(close)
+    if len(breakouts) == 0 or max_wait < 1:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    if jit_kernels.use_loops(backend):
+        return jit_kernels.first_touch_loop(
+            high, low, close, np.asarray(breakouts, dtype=np.int64), np.asarray(bullish, dtype=bool),
+            np.asarray(ote_start, dtype=float), np.asarray(ote_end, dtype=float), max_wait, touch == "overlap",
+        )
+
+    ote_start = ote_start[:, None]
+    ote_end = ote_end[:, None]
+    bearish = ~bullish[:, None]
+    bullish = bullish[:, None]
+
+    # (breakouts x max_wait) grid of the candles each breakout waits on
+    pos = breakouts[:, None] + np.arange(1, max_wait + 1)
+    in_range = pos < n
+    pos = np.minimum(pos, n - 1)
+
+    if touch == "overlap":
+        bull_hit = (low[pos] <= ote_end) & (high[pos] >= ote_start)
+        bear_hit = (high[pos] >= ote_end) & (low[pos] <= ote_start)
+    else:
+        bull_hit = (low[pos] <= ote_end) & (close[pos] >= ote_start)
+        bear_hit = (high[pos] >= ote_end) & (close[pos] <= ote_start)
+    hit = in_range & ((bullish & bull_hit) | (bearish & bear_hit))
+
+    triggered = hit.any(axis=1)
+    entry_pos = breakouts[triggered] + hit[triggered].argmax(axis=1) + 1
+    breakout_pos = breakouts[triggered]
+
+    # breakouts are ascending, so the last occurrence of each entry is the latest source
+    order = np.lexsort((breakout_pos, entry_pos))
+    entry_pos, breakout_pos = entry_pos[order], breakout_pos[order]
+    last = np.ones(len(entry_pos), dtype=bool)
+    last[:-1] = entry_pos[1:] != entry_pos[:-1]
+    return entry_pos[last], breakout_pos[last]
+
+def first_touch_entries(df, max_wait=10, touch="close", backend=None):
+    """
+    For every breakout with an OTE zone, finds the first candle within
+    `max_wait` bars that touches the zone, for all breakouts at once.
+
+    When several breakouts trigger on the same candle, the latest breakout
+    is kept as the source (same as the old loop, which overwrote it).
+
+    Returns:
+        tuple: (entry_pos, breakout_pos) integer arrays, sorted by entry_pos.
+    """
+    direction = df["ote_dir"].to_numpy(dtype=object)
+    breakouts = np.flatnonzero((direction == "bullish") | (direction == "bearish"))
+    if "is_breakout" in df.columns:
+        breakouts = breakouts[df["is_breakout"].to_numpy(dtype=bool)[breakouts]]
+
+    return first_touch(
+        df["High"].to_numpy(dtype=float),
+        df["Low"].to_numpy(dtype=float),
+        df["Close"].to_numpy(dtype=float),
+        breakouts,
+        direction[breakouts] == "bullish",
+        df["ote_start"].to_numpy(dtype=float)[breakouts],
+        df["ote_end"].to_numpy(dtype=float)[breakouts],
+        max_wait=max_wait,
+        touch=touch,
+        backend=backend,
+    )
+
+def detect_entry_signals(df, max_wait=10, touch="close", copy=True, backend=None):
     """
     After each breakout, scan up to `max_wait` candles ahead for an OTE entry trigger.
     Entry = candle enters the OTE zone + closes in the direction of the trend.
+
+    Every entry row also records its source breakout in `entry_from_breakout_time`
+    and `entry_from_breakout_idx` (positional, -1 when the row is not an entry).
     """
-    df = df.copy()
-    df["is_entry"] = False
-    df["entry_price"] = None
-    df["entry_time"] = None
-
-    for i in range(len(df)):
-        if pd.isna(df.iloc[i]["ote_dir"]):
-            continue
-
-        direction = df.iloc[i]["ote_dir"]
-        ote_start = df.iloc[i]["ote_start"]
-        ote_end = df.iloc[i]["ote_end"]
-
-        for j in range(1, max_wait + 1):
-            if i + j >= len(df):
-                break
-            candle = df.iloc[i + j]
-
-            if direction == "bullish":
-                if candle["Low"] <= ote_end and candle["Close"] >= ote_start:
-                    df.at[df.index[i + j], "is_entry"] = True
-                    df.at[df.index[i + j], "entry_price"] = candle["Close"]
-                    df.at[df.index[i + j], "entry_time"] = df.index[i + j]
-                    break  # only take the first valid entry
-
-            elif direction == "bearish":
-                if candle["High"] >= ote_end and candle["Close"] <= ote_start:
-                    df.at[df.index[i + j], "is_entry"] = True
-                    df.at[df.index[i + j], "entry_price"] = candle["Close"]
-                    df.at[df.index[i + j], "entry_time"] = df.index[i + j]
-                    break
+    if copy:
+        df = df.copy()
+    entry_pos, breakout_pos = first_touch_entries(df, max_wait, touch, backend)
+
+    is_entry = np.zeros(len(df), dtype=bool)
+    is_entry[entry_pos] = True
+    source = np.full(len(df), -1, dtype=np.int64)
+    source[entry_pos] = breakout_pos
+
+    times = df.index.to_series(index=df.index)
+    df["is_entry"] = is_entry
+    df["entry_price"] = df["Close"].astype(float).where(is_entry)
+    df["entry_time"] = times.where(is_entry)
+    df["entry_from_breakout_time"] = times.iloc[np.maximum(source, 0)].set_axis(df.index).where(is_entry)
+    df["entry_from_breakout_idx"] = source
 
     return df
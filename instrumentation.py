@@ -0,0 +1,152 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+import tracemalloc
+
+import pandas as pd
+
+# Columns whose appearance marks the signals a stage produced
+SIGNAL_COLUMNS = {"is_breakout": "breakouts", "is_entry": "entries", "trade_result": "trades"}
+
+class NullRecorder:
+    """Recorder used when instrumentation is off: calls the stage and nothing else."""
+
+    enabled = False
+    records = ()
+
+    def run_stage(self, stage, func, df, *args, labels=None, **kwargs):
+        return func(df, *args, **kwargs)
+
+class StageRecorder:
+    """
+    Wraps pipeline stages and records one entry per stage run:
+
+        stage, wall_seconds, cpu_seconds, rows_in, rows_out, new_columns,
+        breakouts / entries / trades (signals of the columns the stage added),
+        peak_mb (tracemalloc peak above the stage's starting point),
+        error (when the stage raised) and, with `profile`, the top functions.
+
+    Parameters:
+        labels (dict): Added to every record, e.g. {"symbol": "BTC-USD"}.
+        memory (bool): Trace allocations (slows allocation-heavy stages a little).
+        profile (bool): Run every stage under cProfile.
+        profile_top (int): Functions kept per profiled stage.
+        profile_dir (str): Optional directory for the raw .prof files.
+    """
+
+    enabled = True
+
+    def __init__(self, labels=None, memory=True, profile=False, profile_top=15, profile_dir=None):
+        self.labels = dict(labels or {})
+        self.memory = memory
+        self.profile = profile
+        self.profile_top = profile_top
+        self.profile_dir = profile_dir
+        self.records = []
+
+    def run_stage(self, stage, func, df, *args, labels=None, **kwargs):
+        record = {**self.labels, **(labels or {}), "stage": stage, "rows_in": len(df)}
+        columns = set(df.columns)
+
+        started_tracing = self.memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        profiler = cProfile.Profile() if self.profile else None
+
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            out = func(df, *args, **kwargs)
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            record["wall_seconds"] = round(time.perf_counter() - wall_start, 6)
+            record["cpu_seconds"] = round(time.process_time() - cpu_start, 6)
+            if self.memory:
+                record["peak_mb"] = round((tracemalloc.get_traced_memory()[1] - baseline) / 2**20, 3)
+            if started_tracing:
+                tracemalloc.stop()
+            if profiler is not None:
+                record["profile"] = self._profile_summary(profiler, record)
+            self.records.append(record)
+
+        new_columns = [c for c in out.columns if c not in columns]
+        record["rows_out"] = len(out)
+        record["new_columns"] = new_columns
+        for column, signal in SIGNAL_COLUMNS.items():
+            if column in new_columns:
+                values = out[column]
+                record[signal] = int(values.notna().sum() if values.dtype.name == "category" else values.sum())
+        return out
+
+    def _profile_summary(self, profiler, record):
+        if self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            name = "_".join(str(record[k]) for k in [*self.labels, "stage"] if k in record)
+            profiler.dump_stats(os.path.join(self.profile_dir, f"{name.replace('/', '_')}.prof"))
+
+        stats = pstats.Stats(profiler, stream=io.StringIO())
+        rows = sorted(stats.stats.items(), key=lambda item: -item[1][3])[:self.profile_top]
+        return [
+            {"function": f"{os.path.basename(file)}:{line}({func})", "ncalls": nc,
+             "tottime": round(tt, 6), "cumtime": round(ct, 6)}
+            for (file, line, func), (cc, nc, tt, ct, callers) in rows
+        ]
+
+    def frame(self):
+        """Records as a DataFrame (one row per stage run, without profiles)."""
+        return records_frame(self.records)
+
+    def to_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.records, f, indent=2, default=str)
+
+    def to_csv(self, path):
+        self.frame().to_csv(path, index=False)
+
+def records_frame(records):
+    """Stage records (from any number of recorders) as a flat DataFrame."""
+    df = pd.DataFrame([{k: v for k, v in r.items() if k != "profile"} for r in records])
+    if "new_columns" in df.columns:
+        df["new_columns"] = df["new_columns"].map(lambda c: ",".join(c) if isinstance(c, list) else c)
+    return df
+
+def aggregate_profiles(records, by=("stage",)):
+    """
+    Aggregates stage records across a whole sweep: runs, total/mean/max wall
+    time, CPU time, peak memory and signal counts per `by` group, plus each
+    group's share of the total wall time.
+    """
+    df = records_frame(records)
+    if df.empty:
+        return df
+    by = [c for c in by if c in df.columns]
+    agg = {
+        "runs": ("wall_seconds", "size"),
+        "wall_total": ("wall_seconds", "sum"),
+        "wall_mean": ("wall_seconds", "mean"),
+        "wall_max": ("wall_seconds", "max"),
+        "cpu_total": ("cpu_seconds", "sum"),
+    }
+    if "peak_mb" in df.columns:
+        agg["peak_mb_max"] = ("peak_mb", "max")
+    for column in SIGNAL_COLUMNS.values():
+        if column in df.columns:
+            agg[column] = (column, "sum")
+    if "error" in df.columns:
+        agg["errors"] = ("error", "count")
+
+    table = df.groupby(by, sort=False).agg(**agg)
+    table["wall_share_pct"] = (table["wall_total"] / table["wall_total"].sum() * 100).round(1)
+    return table.sort_values("wall_total", ascending=False)
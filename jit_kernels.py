@@ -0,0 +1,226 @@
+import os
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # numba is optional, the NumPy kernels are used instead
+    numba = None
+
+HAVE_NUMBA = numba is not None
+BACKENDS = ("auto", "numpy", "numba", "python")
+
+# Kernel backend used when a call does not pass one: "auto" picks numba when it
+# is installed. Set QUANT_KERNELS=numpy to force the NumPy kernels. "python"
+# runs the loop kernels uncompiled, which is only useful to check them.
+_backend = os.environ.get("QUANT_KERNELS", "auto")
+
+def set_backend(backend):
+    """Sets the default kernel backend (one of BACKENDS)."""
+    global _backend
+    _check(backend)
+    _backend = backend
+
+def get_backend():
+    return _backend
+
+def use_loops(backend=None):
+    """True when the loop kernels should run for `backend` (None = the default)."""
+    backend = _check(backend or _backend)
+    if backend == "numba" and not HAVE_NUMBA:
+        raise ImportError("the numba backend needs numba (pip install numba)")
+    return backend in ("numba", "python") or (backend == "auto" and HAVE_NUMBA)
+
+def _check(backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}, got {backend!r}")
+    return backend
+
+def _jit(func):
+    # without numba the kernels stay plain Python (the "python" backend)
+    return numba.njit(cache=True, nogil=True)(func) if HAVE_NUMBA else func
+
+@_jit
+def first_touch_loop(high, low, close, breakouts, bullish, ote_start, ote_end, max_wait, overlap):
+    """
+    Loop version of entry_trigger.first_touch: every breakout scans its
+    `max_wait` candles and stops at the first touch of its zone. A candle
+    touched by several breakouts keeps the latest one as its source.
+    """
+    n = len(close)
+    source = np.full(n, -1, dtype=np.int64)
+    for k in range(len(breakouts)):
+        b = breakouts[k]
+        for pos in range(b + 1, min(b + max_wait + 1, n)):
+            if bullish[k]:
+                reached = close[pos] >= ote_start[k] if not overlap else high[pos] >= ote_start[k]
+                hit = low[pos] <= ote_end[k] and reached
+            else:
+                reached = close[pos] <= ote_start[k] if not overlap else low[pos] <= ote_start[k]
+                hit = high[pos] >= ote_end[k] and reached
+            if hit:
+                source[pos] = b
+                break
+
+    count = 0
+    for pos in range(n):
+        if source[pos] >= 0:
+            count += 1
+    entry_pos = np.empty(count, dtype=np.int64)
+    breakout_pos = np.empty(count, dtype=np.int64)
+    j = 0
+    for pos in range(n):
+        if source[pos] >= 0:
+            entry_pos[j] = pos
+            breakout_pos[j] = source[pos]
+            j += 1
+    return entry_pos, breakout_pos
+
+@_jit
+def resolve_exits_loop(high, low, close, entry_pos, direction, stop_loss, take_profit_1, take_profit_2,
+                       max_holding):
+    """
+    Loop version of backtest.resolve_exits: each trade walks forward until
+    the first candle that hits SL, TP2 or TP1 (in that precedence) or times out.
+    Outcome codes are backtest.OUTCOMES (0 loss, 1 tp2, 2 tp1, 3 timeout).
+    """
+    n = len(close)
+    trades = len(entry_pos)
+    exit_pos = np.empty(trades, dtype=np.int64)
+    outcome = np.empty(trades, dtype=np.int8)
+    exit_price = np.empty(trades, dtype=np.float64)
+    for k in range(trades):
+        e = entry_pos[k]
+        d = direction[k]
+        sl = stop_loss[k]
+        tp1 = take_profit_1[k]
+        tp2 = take_profit_2[k]
+        code = 3
+        for pos in range(e + 1, min(e + 1 + max_holding, n)):
+            if d == 1:
+                if low[pos] <= sl:
+                    code = 0
+                elif high[pos] >= tp2:
+                    code = 1
+                elif high[pos] >= tp1:
+                    code = 2
+            elif d == -1:
+                if high[pos] >= sl:
+                    code = 0
+                elif low[pos] <= tp2:
+                    code = 1
+                elif low[pos] <= tp1:
+                    code = 2
+            if code != 3:
+                exit_pos[k] = pos
+                break
+
+        outcome[k] = code
+        if code == 3:
+            exit_pos[k] = min(e + max_holding, n - 1)
+            exit_price[k] = close[exit_pos[k]]
+        elif code == 0:
+            exit_price[k] = sl
+        elif code == 1:
+            exit_price[k] = tp2
+        else:
+            exit_price[k] = tp1
+    return exit_pos, outcome, exit_price
+
+@_jit
+def swing_extremes_loop(high, low, lookback):
+    """
+    Loop version of the OTE swing window: min Low / max High over
+    [i - lookback, i), NaN before that and (like pandas' rolling) for
+    windows holding a NaN.
+    """
+    n = len(high)
+    swing_low = np.full(n, np.nan)
+    swing_high = np.full(n, np.nan)
+    for i in range(lookback, n):
+        lo = low[i - lookback]
+        hi = high[i - lookback]
+        for j in range(i - lookback + 1, i):
+            lo = min(lo, low[j])
+            hi = max(hi, high[j])
+        swing_low[i] = lo
+        swing_high[i] = hi
+
+    # NaN checks inside the window loop cost more than the loop itself
+    for j in range(n):
+        if np.isnan(low[j]):
+            swing_low[j + 1:j + 1 + lookback] = np.nan
+        if np.isnan(high[j]):
+            swing_high[j + 1:j + 1 + lookback] = np.nan
+    return swing_low, swing_high
+
+@_jit
+def rolling_mean_loop(values, window, tail, state):
+    """
+    pandas' rolling(window).mean() continued from `state`, so a series fed
+    in chunks gets bit-identical means. pandas keeps a compensated running
+    sum from the first value on, so a mean depends (in its last bits) on
+    where the series started.
+
+    Parameters:
+        values (np.ndarray): The next values.
+        tail (np.ndarray): The last `window` values before them (fewer at the start).
+        state (np.ndarray): [sum, add compensation, remove compensation, count,
+            negatives, run of equal values, previous value], updated in place;
+            start from rolling_mean_state().
+    """
+    sum_x, comp_add, comp_remove = state[0], state[1], state[2]
+    nobs, neg_ct, same, prev = int(state[3]), int(state[4]), int(state[5]), state[6]
+    out = np.empty(len(values))
+    offset = len(tail)
+    for k in range(len(values)):
+        i = offset + k
+        if i >= window:
+            old = tail[i - window] if i - window < offset else values[i - window - offset]
+            if old == old:
+                nobs -= 1
+                y = -old - comp_remove
+                t = sum_x + y
+                comp_remove = t - sum_x - y
+                sum_x = t
+                if np.signbit(old):
+                    neg_ct -= 1
+        val = values[k]
+        if val == val:
+            nobs += 1
+            y = val - comp_add
+            t = sum_x + y
+            comp_add = t - sum_x - y
+            sum_x = t
+            if np.signbit(val):
+                neg_ct += 1
+            same = same + 1 if val == prev else 1
+            prev = val
+
+        result = np.nan
+        if nobs >= window and nobs > 0:
+            result = sum_x / nobs
+            if same >= nobs:
+                result = prev
+            elif neg_ct == 0 and result < 0:
+                result = 0.0
+            elif neg_ct == nobs and result > 0:
+                result = 0.0
+        out[k] = result
+
+    state[0], state[1], state[2] = sum_x, comp_add, comp_remove
+    state[3], state[4], state[5], state[6] = nobs, neg_ct, same, prev
+    return out
+
+def rolling_mean_state(first_value):
+    """Initial state of rolling_mean_loop for a series starting with `first_value`."""
+    return np.array([0.0, 0.0, 0.0, 0, 0, 0, first_value], dtype=float)
+
+@_jit
+def wilder_atr_loop(true_range, window, atr):
+    """ta's ATR recursion, atr = (atr * (window - 1) + tr) / window, continued from `atr`."""
+    out = np.empty(len(true_range))
+    for k in range(len(true_range)):
+        atr = (atr * (window - 1) + true_range[k]) / float(window)
+        out[k] = atr
+    return out
@@ -1,26 +1,141 @@
-from alpaca_trade_api.rest import REST
+import os
+import threading
+
 import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
 
-API_KEY = 'PK4R0JPBNKCUVX1UC2PZ'
-API_SECRET = 'NJqH2UPYxUQ1Yxq8qkQO7xCOtvRU2NE5Ib8p0XsS'
+API_KEY = os.environ.get('APCA_API_KEY_ID', 'PK4R0JPBNKCUVX1UC2PZ')
+API_SECRET = os.environ.get('APCA_API_SECRET_KEY', 'NJqH2UPYxUQ1Yxq8qkQO7xCOtvRU2NE5Ib8p0XsS')
 BASE_URL = 'https://paper-api.alpaca.markets'
+DATA_URL = 'https://data.alpaca.markets'
 
-api = REST(API_KEY, API_SECRET, BASE_URL)
+COLUMNS = {"o": "Open", "h": "High", "l": "Low", "c": "Close", "v": "Volume"}
 
-def get_live_data(symbol="BTC/USD", timeframe="15Min", limit=100):
-    bars = api.get_crypto_bars(symbol, timeframe, limit=limit).df
 
-    # ✅ Safe filter only if 'exchange' column exists
-    if 'exchange' in bars.columns:
-        bars = bars[bars['exchange'] == 'CBSE']
+class BarClient:
+    """
+    Crypto bar client on Alpaca's v1beta3 market data API.
+
+    - One request covers many symbols (`symbols=BTC/USD,ETH/USD,...`).
+    - Bars already held are not fetched again: the next request starts at
+      the last held bar (which may have been forming) and only the new bars
+      come back.
+    - Requests longer than one page follow `next_page_token`, so a warm-up
+      of thousands of bars is a few pages instead of a truncated answer.
+    - All requests share one pooled keep-alive session.
+
+    Parameters:
+        base_url (str): Data API root; point it at a local stand-in server for tests.
+        session (requests.Session): Optional session to use instead of a new pooled one.
+        page_limit (int): Bars per page (the API allows up to 10000).
+        keep (int): Bars held per symbol/timeframe.
+    """
+
+    def __init__(self, base_url=DATA_URL, api_key=API_KEY, api_secret=API_SECRET,
+                 session=None, page_limit=10000, keep=5000, pool_size=16):
+        self.base_url = base_url.rstrip('/')
+        self.page_limit = page_limit
+        self.keep = keep
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        session.headers.update({'APCA-API-KEY-ID': api_key, 'APCA-API-SECRET-KEY': api_secret})
+        self.session = session
+        self.frames = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def fetch_bars(self, symbols, timeframe, start, end=None):
+        """
+        Fetches all bars of `symbols` in [start, end] with one (paged) request.
+
+        Returns:
+            dict: symbol -> DataFrame indexed by 'Datetime' with Open/High/Low/Close/Volume.
+        """
+        params = {
+            'symbols': ','.join(symbols),
+            'timeframe': timeframe,
+            'start': pd.Timestamp(start).isoformat(),
+            'limit': self.page_limit,
+            'sort': 'asc',
+        }
+        if end is not None:
+            params['end'] = pd.Timestamp(end).isoformat()
+
+        rows = {symbol: [] for symbol in symbols}
+        while True:
+            response = self.session.get(f'{self.base_url}/v1beta3/crypto/us/bars', params=params, timeout=30)
+            self.requests += 1
+            response.raise_for_status()
+            payload = response.json()
+            for symbol, bars in (payload.get('bars') or {}).items():
+                rows.setdefault(symbol, []).extend(bars)
+
+            token = payload.get('next_page_token')
+            if not token:
+                break
+            params['page_token'] = token
+
+        return {symbol: _to_frame(bars) for symbol, bars in rows.items()}
+
+    def get_bars(self, symbols, timeframe='15Min', limit=100):
+        """
+        Returns the last `limit` bars of every symbol, fetching only what is
+        not held yet. Symbols that start from the same bar share one request.
+        """
+        now = pd.Timestamp.now(tz='UTC')
+        step = pd.Timedelta(timeframe)
+
+        groups = {}
+        for symbol in symbols:
+            held = self.frames.get((symbol, timeframe))
+            if held is None or held.empty or len(held) < limit:
+                start = now.floor(step) - step * limit
+            else:
+                start = held.index[-1]
+            groups.setdefault(start, []).append(symbol)
 
-    # ✅ Filter for the requested symbol
-    bars = bars[bars['symbol'] == symbol]
+        for start, group in groups.items():
+            fetched = self.fetch_bars(group, timeframe, start)
+            with self._lock:
+                for symbol in group:
+                    self._merge(symbol, timeframe, fetched.get(symbol))
+
+        return {symbol: self.frames.get((symbol, timeframe), _to_frame([])).tail(limit) for symbol in symbols}
+
+    def _merge(self, symbol, timeframe, df):
+        held = self.frames.get((symbol, timeframe))
+        if held is not None and df is not None and not df.empty:
+            df = pd.concat([held[held.index < df.index[0]], df])
+        elif df is None or df.empty:
+            df = held if held is not None else _to_frame([])
+        self.frames[(symbol, timeframe)] = df.tail(self.keep)
+
+
+def _to_frame(bars):
+    df = pd.DataFrame(bars, columns=['t', *COLUMNS])
+    df.index = pd.DatetimeIndex(pd.to_datetime(df.pop('t'), utc=True), name='Datetime')
+    return df.rename(columns=COLUMNS).astype(float)
+
+
+_client = None
+
+
+def get_client():
+    """Process wide BarClient, so every caller shares its session and held bars."""
+    global _client
+    if _client is None:
+        _client = BarClient()
+    return _client
+
+
+def get_live_data(symbol="BTC/USD", timeframe="15Min", limit=100):
+    return get_client().get_bars([symbol], timeframe, limit)[symbol]
 
-    # ✅ Format
-    df = bars.reset_index().rename(columns={"timestamp": "Datetime"})
-    df = df[['Datetime', 'open', 'high', 'low', 'close', 'volume']]
-    df.columns = [col.title() for col in df.columns]
-    df.set_index('Datetime', inplace=True)
 
-    return df
+def get_live_data_many(symbols, timeframe="15Min", limit=100):
+    """get_live_data for many symbols in one batched request; returns {symbol: DataFrame}."""
+    return get_client().get_bars(symbols, timeframe, limit)
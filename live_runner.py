@@ -0,0 +1,207 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from streaming_indicators import IndicatorState
+from signal_engine import SignalEngine
+from trend_filter import classify_trend_bias
+
+def next_bar_close(now, interval):
+    """First bar boundary strictly after `now` (boundaries are multiples of `interval` since the epoch)."""
+    return now.floor(interval) + interval
+
+class SystemClock:
+    """Wall clock in UTC."""
+
+    def now(self):
+        return pd.Timestamp.now(tz="UTC")
+
+    async def sleep_until(self, when):
+        await asyncio.sleep(max(0.0, (when - self.now()).total_seconds()))
+
+    def wait_until(self, when):
+        time.sleep(max(0.0, (when - self.now()).total_seconds()))
+
+class VirtualClock:
+    """
+    Clock for tests and replays: sleeping jumps straight to the wake-up time,
+    and `advance` simulates a stall of the process.
+    """
+
+    def __init__(self, start):
+        self.current = pd.Timestamp(start)
+
+    def now(self):
+        return self.current
+
+    def advance(self, delta):
+        self.current += pd.Timedelta(delta)
+
+    async def sleep_until(self, when):
+        self.wait_until(when)
+        await asyncio.sleep(0)
+
+    def wait_until(self, when):
+        self.current = max(self.current, when)
+
+class SymbolWorker:
+    """
+    Live state of one symbol: streaming indicators for both timeframes and
+    a SignalEngine. `process` is plain synchronous code, run off the event loop.
+    """
+
+    def __init__(self, symbol, engine):
+        self.symbol = symbol
+        self.engine = engine
+        self.ltf_indicators = IndicatorState()
+        self.htf_indicators = IndicatorState()
+        self.warmed_up = False
+
+    def process(self, ltf, htf):
+        ltf = self.ltf_indicators.update_frame(ltf)
+        htf = self.htf_indicators.update_frame(htf)
+        # lag=1: the newest HTF bar is still forming
+        ltf = classify_trend_bias(ltf, htf, lag=1, copy=False)
+
+        # the first fetch is history, it only warms the engine up
+        events = self.engine.update_frame(ltf, emit=self.warmed_up)
+        self.warmed_up = True
+        return events
+
+class LiveRunner:
+    """
+    Runs the signal engine for many symbols in one process.
+
+    Every cycle starts `settle` after an LTF bar close, fetches the LTF and
+    HTF bars of all symbols concurrently (at most `max_concurrency` requests
+    in flight, on a thread pool since the REST client blocks) and then
+    processes each symbol on the CPU pool. A symbol that missed bars, because
+    the process stalled or its fetch failed, asks for enough bars to cover
+    the gap and the engine replays all of them.
+
+    Parameters:
+        symbols (list): Symbols to trade, e.g. ["BTC/USD", "ETH/USD"].
+        fetch (callable): (symbol, timeframe, limit) -> OHLCV DataFrame,
+            live_data.get_live_data by default.
+        fetch_many (callable): Optional (symbols, timeframe, limit) -> {symbol: DataFrame},
+            e.g. live_data.get_live_data_many. When given, each cycle fetches
+            the symbols in batches of `batch_size` instead of one by one.
+        timeframe_ltf, timeframe_htf (str): Bar timeframes of the source.
+        settle (str): Delay after the bar close before fetching, so the
+            exchange has published the closed bar.
+        max_concurrency (int): Maximum fetches in flight.
+        history (int): Bars fetched on the first cycle to seed the indicators.
+        limit (int): Bars fetched on later cycles (raised to cover missed bars).
+        variant (str): Strategy variant of the SignalEngine.
+        on_event (callable): (symbol, event) callback; prints by default.
+        clock: SystemClock (default) or VirtualClock, e.g. the clock of a
+            bar_feed.ReplayFeed to replay history through the live code.
+    """
+
+    def __init__(self, symbols, fetch=None, timeframe_ltf="15Min", timeframe_htf="1Hour", settle="5s",
+                 max_concurrency=16, history=1000, limit=100, variant="B", on_event=None, clock=None,
+                 fetch_many=None, batch_size=100):
+        if fetch is None and fetch_many is None:
+            from live_data import get_live_data as fetch
+        self.fetch = fetch
+        self.fetch_many = fetch_many
+        self.batch_size = batch_size
+        self.timeframe_ltf = timeframe_ltf
+        self.timeframe_htf = timeframe_htf
+        self.interval = pd.Timedelta(timeframe_ltf)
+        self.settle = pd.Timedelta(settle)
+        self.max_concurrency = max_concurrency
+        self.history = history
+        self.limit = limit
+        self.on_event = on_event or self._print_event
+        self.clock = clock or SystemClock()
+        self.workers = {symbol: SymbolWorker(symbol, SignalEngine.from_variant(variant)) for symbol in symbols}
+        self.io_pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="fetch")
+        self.cpu_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="signals")
+        self.cycles = 0
+
+    async def run(self, cycles=None):
+        """Runs a cycle after every bar close, forever or for `cycles` cycles."""
+        try:
+            while cycles is None or self.cycles < cycles:
+                await self.clock.sleep_until(next_bar_close(self.clock.now(), self.interval) + self.settle)
+                await self.run_cycle()
+        finally:
+            self.io_pool.shutdown(wait=False)
+            self.cpu_pool.shutdown(wait=False)
+
+    async def run_cycle(self):
+        """Fetches and processes every symbol once; returns {symbol: events}."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        symbols = list(self.workers)
+        if self.fetch_many is None:
+            results = await asyncio.gather(*(self._run_symbol(s, semaphore) for s in symbols), return_exceptions=True)
+        else:
+            results = await self._run_batched(symbols, semaphore)
+
+        events = {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                print(f"⚠️ [{symbol}] Error:", result)
+                continue
+            events[symbol] = result
+            for event in result:
+                self.on_event(symbol, event)
+        self.cycles += 1
+        return events
+
+    async def _run_symbol(self, symbol, semaphore):
+        loop = asyncio.get_running_loop()
+        worker = self.workers[symbol]
+        ltf_limit, htf_limit = self._limits(worker)
+
+        async with semaphore:
+            ltf = await loop.run_in_executor(self.io_pool, self.fetch, symbol, self.timeframe_ltf, ltf_limit)
+            htf = await loop.run_in_executor(self.io_pool, self.fetch, symbol, self.timeframe_htf, htf_limit)
+        return await loop.run_in_executor(self.cpu_pool, worker.process, ltf, htf)
+
+    async def _run_batched(self, symbols, semaphore):
+        loop = asyncio.get_running_loop()
+        limits = [self._limits(self.workers[s]) for s in symbols]
+        ltf_limit = max(limit[0] for limit in limits)
+        htf_limit = max(limit[1] for limit in limits)
+
+        async def fetch_batch(batch):
+            async with semaphore:
+                ltf = await loop.run_in_executor(self.io_pool, self.fetch_many, batch, self.timeframe_ltf, ltf_limit)
+                htf = await loop.run_in_executor(self.io_pool, self.fetch_many, batch, self.timeframe_htf, htf_limit)
+            return ltf, htf
+
+        batches = [symbols[i:i + self.batch_size] for i in range(0, len(symbols), self.batch_size)]
+        fetched = await asyncio.gather(*(fetch_batch(b) for b in batches), return_exceptions=True)
+
+        async def process(symbol, frames):
+            if isinstance(frames, Exception):
+                raise frames
+            ltf, htf = frames
+            if symbol not in ltf or symbol not in htf:
+                raise KeyError(f"no bars returned for {symbol}")
+            return await loop.run_in_executor(self.cpu_pool, self.workers[symbol].process, ltf[symbol], htf[symbol])
+
+        tasks = [process(symbol, frames) for batch, frames in zip(batches, fetched) for symbol in batch]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _limits(self, worker):
+        if not worker.warmed_up:
+            return self.history, self.history
+
+        # bars closed since the last processed one, plus the forming bar
+        last = worker.engine.last_time
+        missed = int((self.clock.now() - last) / self.interval) + 1 if last is not None else 0
+        ltf_limit = max(self.limit, missed + 2)
+        htf_missed = int(ltf_limit * self.interval / pd.Timedelta(self.timeframe_htf)) + 1
+        return ltf_limit, max(self.limit, htf_missed + 2)
+
+    @staticmethod
+    def _print_event(symbol, event):
+        if event["type"] == "entry":
+            print(f"✅ [{symbol}] Entry:", event)
+        elif event["type"] == "exit":
+            print(f"🏁 [{symbol}] Exit:", event)
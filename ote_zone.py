@@ -1,52 +1,84 @@
-def calculate_ote_zones(df, lookback=10):
+import numpy as np
+import pandas as pd
+
+import jit_kernels
+
+OTE_DIRECTIONS = ["bullish", "bearish"]
+
+def zone_levels(high, low, bullish, bearish, swing_low, swing_high):
+    """
+    Fibonacci OTE levels (0.62 / 0.705 / 0.79 of the impulse) for the candles
+    flagged bullish or bearish, rounded to 2 decimals; NaN everywhere else.
+    """
+    # Anchor is the breakout extreme, sign flips the retracement direction
+    anchor = np.where(bullish, high, low)
+    impulse = np.where(bullish, high - swing_low, swing_high - low)
+    sign = np.where(bullish, -1.0, 1.0)
+
+    levels = []
+    for ratio in (0.62, 0.705, 0.79):
+        level = np.round(anchor + sign * ratio * impulse, 2)
+        level[~(bullish | bearish)] = np.nan
+        levels.append(level)
+    return levels[0], levels[1], levels[2]
+
+def ote_levels(df, lookback=10, backend=None):
+    """
+    Computes the OTE zone of every breakout candle at once.
+
+    The swing low/high is taken over the `lookback` candles before the
+    breakout, the same window the old per-row scan used.
+
+    Returns:
+        tuple: float64 arrays (ote_start, ote_best, ote_end) with NaN where
+        there is no zone, and an object array of directions (None = no zone).
+    """
+    n = len(df)
+    high = df["High"].to_numpy(dtype=float)
+    low = df["Low"].to_numpy(dtype=float)
+    bias = df["trend_bias"].to_numpy()
+
+    is_zone = df["is_breakout"].to_numpy(dtype=bool).copy()
+    is_zone[:lookback] = False
+    bullish = is_zone & (bias == "bullish")
+    bearish = is_zone & (bias == "bearish")
+
+    # value at i = swing over [i - lookback, i)
+    if jit_kernels.use_loops(backend):
+        swing_low, swing_high = jit_kernels.swing_extremes_loop(high, low, lookback)
+    else:
+        swing_low = pd.Series(low).rolling(lookback).min().shift(1).to_numpy()
+        swing_high = pd.Series(high).rolling(lookback).max().shift(1).to_numpy()
+    ote_start, ote_best, ote_end = zone_levels(high, low, bullish, bearish, swing_low, swing_high)
+
+    direction = np.full(n, None, dtype=object)
+    direction[bullish] = "bullish"
+    direction[bearish] = "bearish"
+    return ote_start, ote_best, ote_end, direction
+
+def calculate_ote_zones(df, lookback=10, verbose=False, copy=True, backend=None):
     """
     For each breakout candle, calculate the OTE (Optimal Trade Entry) zone
     using a custom Fibonacci retracement: 0.62 to 0.79 (best at 0.705).
+
+    Zone columns are float64 (NaN = no zone) and `ote_dir` is categorical.
+    Set `verbose=True` to print each zone for manual inspection.
     """
-    df = df.copy()
-    df["ote_start"] = None
-    df["ote_best"] = None
-    df["ote_end"] = None
-    df["ote_dir"] = None
-
-    for i in range(lookback, len(df)):
-        row = df.iloc[i]
-
-        if row["is_breakout"] is not True:
-            continue
-
-        bias = row["trend_bias"]
-        if bias not in ["bullish", "bearish"]:
-            continue
-
-        # Identify swing high/low N bars before breakout
-        lookback_window = df.iloc[i - lookback:i]
-
-        if bias == "bullish":
-            swing_low = lookback_window["Low"].min()
-            breakout_high = row["High"]
-
-            impulse_range = breakout_high - swing_low
-            ote_start = breakout_high - 0.62 * impulse_range
-            ote_best = breakout_high - 0.705 * impulse_range
-            ote_end = breakout_high - 0.79 * impulse_range
-
-        elif bias == "bearish":
-            swing_high = lookback_window["High"].max()
-            breakout_low = row["Low"]
-
-            impulse_range = swing_high - breakout_low
-            ote_start = breakout_low + 0.62 * impulse_range
-            ote_best = breakout_low + 0.705 * impulse_range
-            ote_end = breakout_low + 0.79 * impulse_range
-
-        else:
-            continue  # Just in case
-
-        # Store the values in the DataFrame
-        df.at[df.index[i], "ote_start"] = round(ote_start, 2)
-        df.at[df.index[i], "ote_best"] = round(ote_best, 2)
-        df.at[df.index[i], "ote_end"] = round(ote_end, 2)
-        df.at[df.index[i], "ote_dir"] = bias
+    if copy:
+        df = df.copy()
+    ote_start, ote_best, ote_end, direction = ote_levels(df, lookback, backend)
+
+    df["ote_start"] = ote_start
+    df["ote_best"] = ote_best
+    df["ote_end"] = ote_end
+    df["ote_dir"] = pd.Categorical(direction, categories=OTE_DIRECTIONS)
+
+    if verbose:
+        for i in np.flatnonzero(~np.isnan(ote_start)):
+            # 🪵 Debug log for manual inspection
+            print(f"📐 OTE Zone [{df.index[i]}]:")
+            print(f"    ➤ Direction: {direction[i]}")
+            print(f"    ➤ OTE Range: {ote_end[i]} → {ote_start[i]} (best = {ote_best[i]})")
+            print(f"    ➤ Breakout Candle Close: {df['Close'].iloc[i]}\n")
 
     return df
@@ -1,50 +1,64 @@
-import time
-from live_data import get_live_data
+import os
+import pandas as pd
+from bar_feed import LiveFeed, ReplayFeed
+from live_runner import next_bar_close
 from trend_filter import classify_trend_bias
-from breakout_detector import detect_breakouts
-from ote_zone import calculate_ote_zones
-from entry_trigger import detect_entry_signals
-from risk_reward import set_risk_reward
-from ta.trend import EMAIndicator
+from signal_engine import SignalEngine
+from streaming_indicators import IndicatorState
 
 position = None
 trade_log = []
 
+# BAR_FEED=replay pushes the data_collect.py CSVs through this loop as fast as it runs
+if os.environ.get("BAR_FEED") == "replay":
+    feed = ReplayFeed.from_csv({("BTC/USD", "15Min"): "BTC_LTF_15m.csv", ("BTC/USD", "1Hour"): "BTC_HTF_1h.csv"})
+    bars = feed.frames[("BTC/USD", "15Min")].index
+    feed.clock.current = bars[min(1000, len(bars) - 1)]
+    end = bars[-1]
+else:
+    feed = LiveFeed()
+    end = None
+
+# Indicators are seeded once from a long history and then only advanced by new bars
+ltf_indicators = IndicatorState.from_history(feed("BTC/USD", "15Min", limit=1000))
+htf_indicators = IndicatorState.from_history(feed("BTC/USD", "1Hour", limit=1000))
+
+# Strategy B rules, fed one closed bar at a time
+engine = SignalEngine.from_variant("B")
+warming_up = True
+
 
 ''''''
-while True:
+while end is None or feed.clock.now() <= end:
     # 1. Fetch live data
-    ltf = get_live_data("BTC/USD", "15Min")
-    htf = get_live_data("BTC/USD", "1Hour")
+    ltf = feed("BTC/USD", "15Min")
+    htf = feed("BTC/USD", "1Hour")
 
 # Make sure HTF has capitalized column names
     htf.columns = [str(col).title() for col in htf.columns]
 
-# Add EMA indicators
-    htf['ema_50'] = EMAIndicator(close=htf['Close'], window=50).ema_indicator()
-    htf['ema_200'] = EMAIndicator(close=htf['Close'], window=200).ema_indicator()
+# Add indicators (only the bars new since the last fetch are computed)
+    ltf = ltf_indicators.update_frame(ltf)
+    htf = htf_indicators.update_frame(htf)
 
     # 2. Determine trend
-    ltf = classify_trend_bias(ltf, htf)
+    ltf = classify_trend_bias(ltf, htf, lag=1)  # only closed HTF candles
     trend = ltf['trend_bias'].iloc[-1]  # ✅ This gives you the most recent bias
 
 
-    # 3. Detect breakout
-    breakout_leg = detect_breakouts(ltf)
-
-    if breakout_leg['is_breakout'].any():
-        # 4. Calculate OTE zones
-        ote = calculate_ote_zones(breakout_leg)
-
-        # 5. Look for entry trigger inside OTE zone
-        if detect_entry_signals(ltf, ote):
-            # 6. Set SL/TP
-            rr = set_risk_reward(ltf, breakout_leg, ote)
+    # 3. Breakouts, OTE zones, entries and exits of the bars closed since the last cycle
+    # (the first fetch only warms the engine up)
+    events = engine.update_frame(ltf, emit=not warming_up)
+    warming_up = False
 
-            # 7. Simulate paper trade
-            trade_log.append(rr)
-            print("✅ Simulated trade:", rr)
-            position = "open"
+    for event in events:
+        # 4. Simulate paper trade
+        if event["type"] == "entry":
+            trade_log.append(event)
+            print("✅ Simulated trade:", event)
+        elif event["type"] == "exit":
+            print("🏁 Trade closed:", event)
+    position = "open" if engine.open_trades else None
 
-    # 8. Sleep until next candle
-    time.sleep(900)  # 15 min
+    # 5. Sleep until just after the next candle closes (instant on a replay)
+    feed.clock.wait_until(next_bar_close(feed.clock.now(), pd.Timedelta("15Min")) + pd.Timedelta("5s"))
@@ -0,0 +1,253 @@
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+
+from a_backtest import add_indicators
+from trend_filter import classify_trend_bias
+from breakout_detector import breakout_features, breakout_mask_from_features, prior_rolling
+from ote_zone import zone_levels
+from entry_trigger import first_touch
+from risk_reward import atr_levels, forward_extreme
+from backtest import resolve_exits, LOSS, TP1, TP2
+
+# Grid keys in stage order; combinations are evaluated with the last key
+# changing fastest so every earlier stage result is reused as long as possible.
+PARAM_ORDER = [
+    "range_window", "range_pct", "vol_multiplier", "rsi_threshold",  # detect_breakouts
+    "lookback",                                                       # calculate_ote_zones
+    "max_wait", "touch",                                              # detect_entry_signals
+    "risk_reward",                                                    # set_risk_reward(_loose)
+    "max_holding",                                                    # run_backtest
+]
+
+DEFAULTS = {
+    "range_window": 10, "range_pct": 0.005, "vol_multiplier": 1.5, "rsi_threshold": 60,
+    "lookback": 10, "max_wait": 10, "touch": "overlap", "risk_reward": "structure", "max_holding": 20,
+}
+
+# Fixed settings of the two risk/reward stages (see a_backtest / b_backtest)
+STRUCTURE_LOOKBACK = 30
+DIRECTION_CARRY = 10
+
+class FeatureCache:
+    """
+    Parameter independent inputs of one dataset, computed once: the price,
+    volume, RSI and ATR arrays plus every rolling window statistic asked for
+    (rolling highs/lows per window size, rolling body medians).
+    """
+
+    def __init__(self, ltf_df, htf_df=None):
+        if "trend_bias" not in ltf_df.columns:
+            ltf_df = classify_trend_bias(add_indicators(ltf_df.copy()), add_indicators(htf_df.copy()))
+        self.index = ltf_df.index
+        self.features = breakout_features(ltf_df)
+        self.atr = ltf_df["atr"].to_numpy(dtype=float)
+        self._rolling = {}
+
+    def prior(self, name, window, how):
+        """prior_rolling of a feature array, memoized per (feature, window, statistic)."""
+        key = ("prior", name, window, how)
+        if key not in self._rolling:
+            self._rolling[key] = prior_rolling(self.features[name], window, how)
+        return self._rolling[key]
+
+    def forward(self, name, window, how):
+        """forward_extreme of a feature array, memoized per (feature, window, statistic)."""
+        key = ("forward", name, window, how)
+        if key not in self._rolling:
+            self._rolling[key] = forward_extreme(self.features[name], window, how)
+        return self._rolling[key]
+
+class ParamSweep:
+    """
+    Evaluates many parameter combinations of the breakout -> OTE -> entry ->
+    risk/reward -> exit chain against one FeatureCache.
+
+    Each stage result is memoized on the parameters it depends on, so a
+    combination only recomputes the stages after its first changed parameter.
+    Results match running the Pipeline with the same parameters.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._memo = {}
+
+    def _stage(self, name, key, compute):
+        cached = self._memo.get(name)
+        if cached is None or cached[0] != key:
+            cached = (key, compute())
+            self._memo[name] = cached
+        return cached[1]
+
+    def evaluate(self, window=None, **params):
+        """
+        Returns the summary (same fields as ab_test.summarize_backtest) of one
+        combination; with `window` = (start, stop) positions only the
+        breakouts and trades entered in that range count.
+        """
+        return self.summarize(self.signals(**params), window=window)
+
+    def signals(self, **params):
+        """Full-series (breakout mask, entry positions, (exit_pos, outcome, reward)) of one combination."""
+        p = {**DEFAULTS, **params}
+        keys = [tuple(p[k] for k in PARAM_ORDER[:i]) for i in (4, 5, 7, 8, 9)]
+
+        mask = self._stage("breakouts", keys[0], lambda: self._breakouts(p))
+        zones = self._stage("ote", keys[1], lambda: self._zones(mask, p))
+        entries = self._stage("entries", keys[2], lambda: self._entries(zones, p))
+        levels = self._stage("risk_reward", keys[3], lambda: self._levels(zones, entries, p))
+        trades = self._stage("backtest", keys[4], lambda: self._exits(entries, levels, p))
+        return mask, entries, trades
+
+    def run(self, grid, progress_every=0):
+        """
+        Evaluates every combination of `grid` ({param: [values]}, missing
+        params use DEFAULTS) and returns one row per combination.
+        """
+        unknown = set(grid) - set(PARAM_ORDER)
+        if unknown:
+            raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+
+        names = [k for k in PARAM_ORDER if k in grid]
+        rows = []
+        start = time.perf_counter()
+        for n, values in enumerate(itertools.product(*(grid[k] for k in names)), 1):
+            params = dict(zip(names, values))
+            rows.append({**params, **self.evaluate(**params)})
+            if progress_every and n % progress_every == 0:
+                print(f"⏱️ {n} combinations in {time.perf_counter() - start:.1f}s")
+        return pd.DataFrame(rows)
+
+    def _breakouts(self, p):
+        w = p["range_window"]
+        return breakout_mask_from_features(
+            self.cache.features, w, p["range_pct"], p["vol_multiplier"], p["rsi_threshold"],
+            max_high=self.cache.prior("high", w, "max"),
+            min_low=self.cache.prior("low", w, "min"),
+            median_body=self.cache.prior("body", w, "median"),
+        )
+
+    def _zones(self, mask, p):
+        f, lookback = self.cache.features, p["lookback"]
+        is_zone = mask.copy()
+        is_zone[:lookback] = False
+        bullish = is_zone & f["bullish"]
+        bearish = is_zone & f["bearish"]
+        ote_start, _, ote_end = zone_levels(
+            f["high"], f["low"], bullish, bearish,
+            self.cache.prior("low", lookback, "min"), self.cache.prior("high", lookback, "max"),
+        )
+        return bullish, bearish, ote_start, ote_end
+
+    def _entries(self, zones, p):
+        f = self.cache.features
+        bullish, bearish, ote_start, ote_end = zones
+        breakouts = np.flatnonzero(bullish | bearish)
+        entry_pos, _ = first_touch(
+            f["high"], f["low"], f["close"], breakouts, bullish[breakouts],
+            ote_start[breakouts], ote_end[breakouts], max_wait=p["max_wait"], touch=p["touch"],
+        )
+        return entry_pos
+
+    def _levels(self, zones, entry_pos, p):
+        f = self.cache.features
+        bullish, bearish = zones[0], zones[1]
+
+        # direction on the entry row = ote_dir forward filled DIRECTION_CARRY bars
+        zone_dir = np.where(bullish, 1, np.where(bearish, -1, 0))
+        last_zone = np.maximum.accumulate(np.where(zone_dir != 0, np.arange(len(zone_dir)), -1))[entry_pos]
+        carried = (last_zone >= 0) & (entry_pos - last_zone <= DIRECTION_CARRY)
+        direction = np.where(carried, zone_dir[np.maximum(last_zone, 0)], 0)
+
+        if p["risk_reward"] == "structure":
+            direction = np.where(entry_pos >= STRUCTURE_LOOKBACK, direction, 0)
+            cap = np.where(
+                direction > 0,
+                self.cache.forward("high", STRUCTURE_LOOKBACK, "max")[entry_pos],
+                self.cache.forward("low", STRUCTURE_LOOKBACK, "min")[entry_pos],
+            )
+            sl, tp1, tp2, rr1, rr2 = atr_levels(f["close"][entry_pos], self.cache.atr[entry_pos], direction, 1.5, 2.5, cap)
+            rr1[rr1 == 0] = np.nan
+            rr2[rr2 == 0] = np.nan
+        elif p["risk_reward"] == "loose":
+            direction = np.where(entry_pos >= 1, direction, 0)
+            sl, tp1, tp2, rr1, rr2 = atr_levels(f["close"][entry_pos], self.cache.atr[entry_pos], direction, 1.5, 3.0)
+        else:
+            raise ValueError(f"Unknown risk_reward: {p['risk_reward']}")
+        return direction, sl, tp1, tp2, rr1, rr2
+
+    def _exits(self, entry_pos, levels, p):
+        f = self.cache.features
+        direction, sl, tp1, tp2, rr1, rr2 = levels
+        exit_pos, outcome, _ = resolve_exits(
+            f["high"], f["low"], f["close"], entry_pos, direction, sl, tp1, tp2, max_holding=p["max_holding"]
+        )
+        reward = np.select([outcome == LOSS, outcome == TP2, outcome == TP1], [-1.0, rr2, rr1], default=0.0)
+        return exit_pos, outcome, reward
+
+    def lookahead(self, **params):
+        """
+        Bars after its entry a trade of one combination may read: its exit
+        scans max_holding bars and the structure TP2 cap the entry bar plus
+        the next STRUCTURE_LOOKBACK - 1.
+        """
+        p = {**DEFAULTS, **params}
+        return max(p["max_holding"], STRUCTURE_LOOKBACK - 1 if p["risk_reward"] == "structure" else 0)
+
+    def summarize(self, signals, window=None, purge=0):
+        """
+        Summary of `signals` (see signals), optionally of the (start, stop)
+        window only. `purge` drops the trades entered in the last `purge`
+        bars of the window, e.g. lookahead(**params) so no trade reads a bar
+        past the window end.
+        """
+        mask, entry_pos, (exit_pos, outcome, reward) = signals
+        if window is not None:
+            # entry positions are sorted
+            start, stop = window
+            first, last = np.searchsorted(entry_pos, [start, max(start, stop - purge)])
+            keep = slice(first, last)
+            mask, entry_pos = mask[start:stop], entry_pos[keep]
+            exit_pos, outcome, reward = exit_pos[keep], outcome[keep], reward[keep]
+        entries = len(entry_pos)
+        wins = int(np.isin(outcome, [TP1, TP2]).sum())
+        holding = np.round(np.asarray((self.cache.index[exit_pos] - self.cache.index[entry_pos]) / pd.Timedelta(minutes=1), dtype=float), 1)
+        return {
+            "total_breakouts": int(mask.sum()),
+            "entries": entries,
+            "wins": wins,
+            "losses": int((outcome == LOSS).sum()),
+            "win_rate": round(wins / entries * 100, 2) if entries else 0,
+            "avg_holding_time": round(holding.mean(), 1) if entries else 0,
+            "net_r": round(np.nansum(reward), 2) if entries else 0,
+        }
+
+def variant_params(variant):
+    """Sweep parameters of a pipeline variant, given by name ("A", "B") or as {stage: params}."""
+    from pipeline import VARIANTS
+
+    stages = VARIANTS[variant] if isinstance(variant, str) else variant
+    params = dict(DEFAULTS)
+    for stage, values in stages.items():
+        for name, value in values.items():
+            if (stage, name) == ("risk_reward", "method"):
+                name = "risk_reward"
+            if name not in PARAM_ORDER:
+                raise ValueError(f"{stage}.{name} is not a sweep parameter")
+            params[name] = value
+    return params
+
+def run_param_sweep(ltf_df, htf_df, grid, progress_every=0):
+    """
+    Precomputes the features of one dataset once and evaluates every
+    combination of `grid`, e.g.
+
+        run_param_sweep(ltf, htf, {"range_pct": [0.005, 0.01], "max_holding": [10, 20, 40]})
+
+    Returns:
+        pd.DataFrame: One row per combination with its parameters and
+        total_breakouts / entries / wins / losses / win_rate / avg_holding_time / net_r.
+    """
+    return ParamSweep(FeatureCache(ltf_df, htf_df)).run(grid, progress_every=progress_every)
@@ -0,0 +1,193 @@
+import time
+import tracemalloc
+
+from a_backtest import add_indicators, set_risk_reward
+from b_backtest import set_risk_reward_loose
+from trend_filter import classify_trend_bias
+from breakout_detector import detect_breakouts
+from ote_zone import calculate_ote_zones
+from entry_trigger import detect_entry_signals
+from backtest import run_backtest
+from instrumentation import NullRecorder
+
+STAGES = ["indicators", "trend_bias", "breakouts", "ote", "entries", "risk_reward", "backtest"]
+
+RISK_REWARD = {
+    "structure": set_risk_reward,     # A: ATR levels, TP2 capped by the next swing
+    "loose": set_risk_reward_loose,   # B: plain ATR multiples
+}
+
+# Stage parameters of the two strategy variants; unspecified stages use the defaults
+VARIANTS = {
+    "A": {
+        "breakouts": {"range_pct": 0.005, "vol_multiplier": 1.5, "rsi_threshold": 60},
+        "risk_reward": {"method": "structure"},
+    },
+    "B": {
+        "breakouts": {"range_pct": 0.01, "vol_multiplier": 1.2, "rsi_threshold": 55},
+        "risk_reward": {"method": "loose"},
+    },
+}
+
+def _indicators(df, htf_df):
+    add_indicators(htf_df)
+    return add_indicators(df)
+
+def _trend_bias(df, htf_df, lag=0):
+    return classify_trend_bias(df, htf_df, lag=lag, copy=False)
+
+def _breakouts(df, htf_df, **params):
+    return detect_breakouts(df, copy=False, **params)
+
+def _ote(df, htf_df, lookback=10):
+    return calculate_ote_zones(df, lookback=lookback, copy=False)
+
+def _entries(df, htf_df, max_wait=10, touch="overlap", carry=10):
+    df = detect_entry_signals(df, max_wait=max_wait, touch=touch, copy=False)
+    # risk/reward and the backtest read the direction on the entry row itself
+    df["ote_dir"] = df["ote_dir"].ffill(limit=carry)
+    return df
+
+def _risk_reward(df, htf_df, method="structure", **params):
+    return RISK_REWARD[method](df, copy=False, **params)
+
+def _backtest(df, htf_df, max_holding=20):
+    return run_backtest(df, max_holding=max_holding, ladder=True, copy=False)
+
+STAGE_FUNCS = {
+    "indicators": _indicators,
+    "trend_bias": _trend_bias,
+    "breakouts": _breakouts,
+    "ote": _ote,
+    "entries": _entries,
+    "risk_reward": _risk_reward,
+    "backtest": _backtest,
+}
+
+def resolve_params(params):
+    """Completes a variant's stage parameters with an (empty = defaults) entry per stage."""
+    return {stage: dict(params.get(stage, {})) for stage in STAGES}
+
+def _params_key(params):
+    return tuple(sorted((name, repr(value)) for name, value in params.items()))
+
+class Pipeline:
+    """
+    Runs the backtest stages over a single LTF frame that every stage appends
+    its columns to, instead of each stage returning a fresh copy.
+
+    Parameters:
+        variant (str): Key into VARIANTS ("A" or "B").
+        params (dict): Per-stage overrides, e.g. {"breakouts": {"range_pct": 0.01}}.
+        copy (bool): Copy the input frames once up front so the caller's frames
+            are left untouched. Without it the input frames are modified in place.
+        track_memory (bool): Record the peak traced memory of every stage
+            (tracemalloc slows allocation-heavy stages down a little).
+        recorder (instrumentation.StageRecorder): Optional detailed per-stage
+            instrumentation (CPU time, rows, signals, cProfile); off by default.
+
+    After `run`, `report` holds one dict per stage with its wall time,
+    peak memory (MB) and the columns it added.
+    """
+
+    def __init__(self, variant="A", params=None, copy=False, track_memory=True, recorder=None):
+        self.variant = variant
+        self.params = resolve_params(VARIANTS[variant])
+        for stage, overrides in (params or {}).items():
+            self.params[stage].update(overrides)
+        self.copy = copy
+        self.track_memory = track_memory
+        self.recorder = recorder or NullRecorder()
+        self.report = []
+
+    def run(self, ltf_df, htf_df, stages=STAGES):
+        if self.copy:
+            ltf_df = ltf_df.copy()
+            htf_df = htf_df.copy()
+
+        self.report = []
+        started_tracing = self.track_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+
+        try:
+            for stage in stages:
+                ltf_df = self._run_stage(stage, ltf_df, htf_df)
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+
+        return ltf_df
+
+    def _run_stage(self, stage, df, htf_df):
+        columns = list(df.columns)
+        if self.track_memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+
+        start = time.perf_counter()
+        df = self.recorder.run_stage(stage, STAGE_FUNCS[stage], df, htf_df, labels={"variant": self.variant},
+                                     **self.params[stage])
+        elapsed = time.perf_counter() - start
+
+        peak_mb = None
+        if self.track_memory:
+            peak_mb = round((tracemalloc.get_traced_memory()[1] - baseline) / 2**20, 2)
+
+        self.report.append({
+            "stage": stage,
+            "seconds": round(elapsed, 4),
+            "peak_mb": peak_mb,
+            "new_columns": [c for c in df.columns if c not in columns],
+        })
+        return df
+
+def run_variants(ltf_df, htf_df, variants=VARIANTS, copy=False, recorder=None):
+    """
+    Runs several variants declared as stage parameter sets, computing every
+    stage prefix they share only once.
+
+    Variants are grouped stage by stage on their parameters; a group only
+    splits at the first stage whose parameters differ, and each branch then
+    continues on its own shallow copy of the shared frame (new columns stay
+    per branch, the prefix columns are not duplicated).
+
+    Parameters:
+        ltf_df, htf_df (pd.DataFrame): Raw OHLCV frames.
+        variants (dict): name -> {stage: params}, e.g. VARIANTS or
+            {"A": VARIANTS["A"], "wide": {"breakouts": {"range_pct": 0.02}}}.
+        copy (bool): Copy the input frames once so they are left untouched.
+        recorder (instrumentation.StageRecorder): Optional per-stage
+            instrumentation; shared stages are recorded once, labelled with
+            every variant they served (e.g. variant="A,B").
+
+    Returns:
+        dict: name -> result frame. Variants with identical parameters share one frame.
+    """
+    if copy:
+        ltf_df = ltf_df.copy()
+        htf_df = htf_df.copy()
+
+    resolved = {name: resolve_params(params) for name, params in variants.items()}
+    recorder = recorder or NullRecorder()
+    results = {}
+
+    def branch(df, names, depth):
+        if depth == len(STAGES):
+            for name in names:
+                results[name] = df
+            return
+
+        stage = STAGES[depth]
+        groups = {}
+        for name in names:
+            groups.setdefault(_params_key(resolved[name][stage]), []).append(name)
+
+        for group in groups.values():
+            frame = df if len(groups) == 1 else df.copy(deep=False)
+            frame = recorder.run_stage(stage, STAGE_FUNCS[stage], frame, htf_df,
+                                       labels={"variant": ",".join(group)}, **resolved[group[0]][stage])
+            branch(frame, group, depth + 1)
+
+    branch(ltf_df, list(resolved), 0)
+    return {name: results[name] for name in variants}
@@ -0,0 +1,266 @@
+import hashlib
+import json
+import math
+import os
+import sqlite3
+
+import pandas as pd
+
+RESULTS_DB = "backtest_results.sqlite"
+
+# Summary columns as ab_test.summarize_backtest builds them (test_type = variant)
+SUMMARY_COLUMNS = ["total_breakouts", "entries", "wins", "losses", "win_rate", "avg_holding_time", "net_r"]
+KEY_COLUMNS = ["run_id", "symbol", "variant", "ltf_period", "htf_period", "params_hash"]
+TRADE_COLUMNS = [
+    "entry_time", "direction", "entry_price", "stop_loss", "take_profit_1", "take_profit_2", "rr_1", "rr_2",
+    "trade_result", "exit_price", "exit_time", "holding_time", "reward_achieved",
+]
+CSV_COLUMNS = ["symbol", "test_type", "ltf_period", "htf_period", *SUMMARY_COLUMNS]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    ltf_period TEXT NOT NULL,
+    htf_period TEXT NOT NULL,
+    params_hash TEXT NOT NULL,
+    params TEXT,
+    updated TEXT NOT NULL,
+    total_breakouts INTEGER,
+    entries INTEGER,
+    wins INTEGER,
+    losses INTEGER,
+    win_rate REAL,
+    avg_holding_time REAL,
+    net_r REAL,
+    UNIQUE (run_id, symbol, variant, ltf_period, htf_period, params_hash)
+);
+CREATE INDEX IF NOT EXISTS results_by_symbol ON results (symbol, variant, ltf_period, htf_period);
+CREATE INDEX IF NOT EXISTS results_by_net_r ON results (variant, ltf_period, htf_period, net_r);
+
+CREATE TABLE IF NOT EXISTS trades (
+    result_id INTEGER NOT NULL REFERENCES results (id) ON DELETE CASCADE,
+    entry_time TEXT,
+    direction TEXT,
+    entry_price REAL,
+    stop_loss REAL,
+    take_profit_1 REAL,
+    take_profit_2 REAL,
+    rr_1 REAL,
+    rr_2 REAL,
+    trade_result TEXT,
+    exit_price REAL,
+    exit_time TEXT,
+    holding_time REAL,
+    reward_achieved REAL
+);
+CREATE INDEX IF NOT EXISTS trades_by_result ON trades (result_id);
+
+-- which runs every CSV export holds
+CREATE TABLE IF NOT EXISTS csv_exports (
+    path TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    UNIQUE (path, run_id)
+);
+"""
+
+UPSERT = f"""
+INSERT INTO results ({", ".join(KEY_COLUMNS)}, params, updated, {", ".join(SUMMARY_COLUMNS)})
+VALUES ({", ".join("?" * (len(KEY_COLUMNS) + 2 + len(SUMMARY_COLUMNS)))})
+ON CONFLICT ({", ".join(KEY_COLUMNS)}) DO UPDATE SET
+    params = excluded.params,
+    updated = excluded.updated,
+    {", ".join(f"{c} = excluded.{c}" for c in SUMMARY_COLUMNS)}
+RETURNING id
+"""
+
+def params_hash(params):
+    """Short stable hash of a parameter dict (e.g. a pipeline variant), "" for no parameters."""
+    if not params:
+        return ""
+    text = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+def trade_records(result_df):
+    """Per-trade rows (TRADE_COLUMNS) of a finished backtest frame, one per entry."""
+    entries = result_df[result_df["is_entry"] == True]
+    trades = pd.DataFrame(index=range(len(entries)))
+    for column in TRADE_COLUMNS:
+        source = {"entry_time": None, "direction": "ote_dir"}.get(column, column)
+        if column == "entry_time":
+            values = entries.index
+        elif source in entries.columns:
+            values = entries[source]
+        else:
+            continue
+        trades[column] = list(values)
+    return trades
+
+class ResultsStore:
+    """
+    SQLite database of backtest results: one `results` row per
+    (run_id, symbol, variant, ltf_period, htf_period, params_hash) holding
+    the summary, and the run's trades in `trades`.
+
+    Saving a result again with the same key replaces it (summary and
+    trades), so reruns never duplicate rows. `run_id` names a sweep; use a
+    new one to keep the results of an earlier sweep next to the new ones.
+
+    A CSV export holds the runs attached to it (attach_csv). Attaching a
+    path for the first time imports the rows the file already has, so the
+    history it held survives the first export.
+
+    Parameters:
+        path (str): Database file, created on first use.
+    """
+
+    def __init__(self, path=RESULTS_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def upsert(self, summary, params=None, trades=None, run_id="default"):
+        """Saves one summary (a summarize_backtest dict) and its trades; returns the result id."""
+        return self.upsert_many([(summary, params, trades)], run_id)[0]
+
+    def upsert_many(self, results, run_id="default"):
+        """
+        Saves (summary, params, trades) tuples in one transaction; `trades`
+        may be None to keep only the summary. Returns the result ids.
+        """
+        updated = pd.Timestamp.now(tz="UTC").isoformat()
+        ids = []
+        with self.conn:
+            for summary, params, trades in results:
+                key = [run_id, summary["symbol"], summary["test_type"], summary["ltf_period"],
+                       summary["htf_period"], params_hash(params)]
+                row = [*key, json.dumps(params, sort_keys=True, default=str) if params else None, updated,
+                       *(_value(summary.get(c)) for c in SUMMARY_COLUMNS)]
+                result_id = self.conn.execute(UPSERT, row).fetchone()[0]
+                self.conn.execute("DELETE FROM trades WHERE result_id = ?", (result_id,))
+                if trades is not None and len(trades):
+                    columns = [c for c in TRADE_COLUMNS if c in trades.columns]
+                    self.conn.executemany(
+                        f"INSERT INTO trades (result_id, {', '.join(columns)}) "
+                        f"VALUES (?, {', '.join('?' * len(columns))})",
+                        ([result_id, *map(_value, values)] for values in trades[columns].itertuples(index=False)),
+                    )
+                ids.append(result_id)
+        return ids
+
+    def summaries(self, **filters):
+        """
+        Summary rows matching equality filters, e.g. summaries(variant="B", ltf_period="60d");
+        a list matches any of its values, e.g. summaries(run_id=["a", "b"]).
+        """
+        where, args = _where(filters)
+        return pd.read_sql_query(f"SELECT * FROM results {where} ORDER BY id", self.conn, params=args)
+
+    def best(self, by="net_r", **filters):
+        """The best summary per symbol by `by` (highest first), e.g. best(variant="B", htf_period="1y")."""
+        if by not in SUMMARY_COLUMNS:
+            raise ValueError(f"by must be one of {SUMMARY_COLUMNS}, got {by!r}")
+        where, args = _where(filters)
+        query = f"""
+            SELECT * FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY {by} DESC, id) AS rank
+                FROM results {where}
+            ) WHERE rank = 1 ORDER BY {by} DESC
+        """
+        return pd.read_sql_query(query, self.conn, params=args).drop(columns="rank")
+
+    def trades(self, **filters):
+        """Trades joined with the key of their result, filtered like `summaries`."""
+        where, args = _where(filters, table="r")
+        query = f"""
+            SELECT r.{", r.".join(KEY_COLUMNS)}, t.* FROM trades t JOIN results r ON r.id = t.result_id
+            {where} ORDER BY t.result_id, t.entry_time
+        """
+        df = pd.read_sql_query(query, self.conn, params=args)
+        for column in ["entry_time", "exit_time"]:
+            df[column] = pd.to_datetime(df[column], utc=True, format="ISO8601")
+        return df
+
+    def export_csv(self, path, **filters):
+        """Writes the summaries in the backtest_result_combined.csv layout; returns the row count."""
+        df = self.summaries(**filters).rename(columns={"variant": "test_type"})
+        df[CSV_COLUMNS].to_csv(path, index=False)
+        return len(df)
+
+    def attach_csv(self, path, run_id):
+        """
+        Adds `run_id` to the runs exported to the CSV at `path`. The first
+        time a path is attached, an existing file is imported first (as run
+        "imported:<file name>").
+        """
+        path = os.path.normpath(path)
+        with self.conn:
+            if not self.attached_runs(path) and os.path.exists(path):
+                imported = f"imported:{os.path.basename(path)}"
+                self.import_csv(path, run_id=imported)
+                self.conn.execute("INSERT OR IGNORE INTO csv_exports VALUES (?, ?)", (path, imported))
+            self.conn.execute("INSERT OR IGNORE INTO csv_exports VALUES (?, ?)", (path, run_id))
+
+    def attached_runs(self, path):
+        """Run ids exported to the CSV at `path`, see attach_csv."""
+        rows = self.conn.execute("SELECT run_id FROM csv_exports WHERE path = ?", (os.path.normpath(path),))
+        return [run_id for (run_id,) in rows]
+
+    def export_attached(self, path):
+        """Rewrites the CSV at `path` with the summaries of its attached runs; returns the row count."""
+        return self.export_csv(path, run_id=self.attached_runs(path))
+
+    def import_csv(self, path, run_id="imported", params=None):
+        """
+        Loads a results CSV in the backtest_result_combined.csv layout (rows
+        of the same key collapse onto the last one). Returns the rows read.
+        """
+        df = pd.read_csv(path, dtype={"ltf_period": str, "htf_period": str})
+        for column in ["ltf_period", "htf_period"]:
+            if column not in df.columns:
+                df[column] = ""
+        self.upsert_many(((row, params, None) for row in df.to_dict("records")), run_id)
+        return len(df)
+
+def _where(filters, table=None):
+    prefix = f"{table}." if table else ""
+    unknown = set(filters) - {*KEY_COLUMNS, "params"}
+    if unknown:
+        raise ValueError(f"Unknown filters: {sorted(unknown)}")
+    if not filters:
+        return "", []
+    clauses, args = [], []
+    for column, value in filters.items():
+        # a list matches any of its values
+        if isinstance(value, (list, tuple)):
+            clauses.append(f"{prefix}{column} IN ({', '.join('?' * len(value))})")
+            args.extend(value)
+        else:
+            clauses.append(f"{prefix}{column} = ?")
+            args.append(value)
+    return f"WHERE {' AND '.join(clauses)}", args
+
+def _value(value):
+    """Python value SQLite can store: timestamps as ISO strings, NaN/None as NULL."""
+    if value is None or value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
@@ -1,3 +1,49 @@
+import numpy as np
+import pandas as pd
+
+def forward_extreme(values, window, how):
+    """Rolling max/min over [i, i + window), truncated at the end of the series."""
+    rolled = getattr(pd.Series(values[::-1]).rolling(window, min_periods=1), how)()
+    return rolled.to_numpy()[::-1]
+
+def atr_levels(entry, atr, direction, rr1_mult=1.5, rr2_mult=2.5, tp2_cap=None):
+    """
+    ATR based stop loss and take profits for many trades at once.
+
+    Parameters:
+        entry, atr (np.ndarray): Entry price and ATR per trade.
+        direction (np.ndarray): +1 bullish, -1 bearish, 0 = no direction.
+        rr1_mult, rr2_mult (float): TP1/TP2 distance in ATRs (SL is 1 ATR).
+        tp2_cap (np.ndarray): Optional structure level TP2 may not go past
+            (a swing high for longs, a swing low for shorts).
+
+    Returns:
+        tuple: (sl, tp1, tp2, rr1, rr2) rounded to 2 decimals; NaN for trades
+        without a direction or without a usable ATR.
+    """
+    entry = np.asarray(entry, dtype=float)
+    atr = np.asarray(atr, dtype=float)
+    sign = np.asarray(direction, dtype=float)
+
+    sl = entry - sign * atr
+    tp1 = entry + sign * rr1_mult * atr
+    tp2 = entry + sign * rr2_mult * atr
+    if tp2_cap is not None:
+        tp2 = np.where(sign > 0, np.minimum(tp2, tp2_cap), np.maximum(tp2, tp2_cap))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        risk = np.abs(entry - sl)
+        rr1 = np.abs(tp1 - entry) / risk
+        rr2 = np.abs(tp2 - entry) / risk
+
+    valid = (sign != 0) & ~np.isnan(atr) & (atr != 0)
+    out = []
+    for values in (sl, tp1, tp2, rr1, rr2):
+        values = np.round(values, 2)
+        values[~valid] = np.nan
+        out.append(values)
+    return tuple(out)
+
 def set_risk_reward(df, lookback=10):
     df = df.copy()
     df["stop_loss"] = None
@@ -0,0 +1,257 @@
+import math
+import statistics
+from collections import deque
+
+import numpy as np
+
+# Fixed settings of the risk/reward methods, same as a_backtest / b_backtest
+RISK_REWARD = {
+    "structure": {"min_index": 30, "rr1_mult": 1.5, "rr2_mult": 2.5},
+    "loose": {"min_index": 1, "rr1_mult": 1.5, "rr2_mult": 3.0},
+}
+
+def _round(value):
+    # np.round, not round(): the batch stages round with numpy
+    return float(np.round(value, 2))
+
+class SignalEngine:
+    """
+    Bar-by-bar version of the breakout -> OTE -> entry -> risk/reward -> exit
+    stages, for live trading.
+
+    Every closed bar goes through `on_bar`, which only touches the state that
+    bar can change: the rolling range windows, the zones still waiting for a
+    touch (at most `max_wait` bars old), the direction carried from the last
+    zone and the open trades. Fed the same history bar by bar it produces the
+    same breakouts, entries, levels and exits as the batch Pipeline, with two
+    exceptions that need the future:
+      - "structure" (A) caps TP2 with the extreme of the *next* 30 candles in
+        the batch backtest; live TP2 is left uncapped.
+      - the batch backtest times out trades still open at the end of the data
+        on the last candle; live trades stay open until `close_all`.
+
+    Parameters:
+        range_window, range_pct, vol_multiplier, rsi_threshold: detect_breakouts rules.
+        lookback (int): Swing window of calculate_ote_zones.
+        max_wait (int), touch (str): detect_entry_signals settings.
+        carry (int): Bars the last zone's direction is carried to entries.
+        risk_reward (str): "loose" (B) or "structure" (A), see RISK_REWARD.
+        max_holding (int): Candles a trade stays open before it times out.
+        indicators (IndicatorState): Optional; computes rsi / vol_avg_20 / atr
+            from the bars. Without it every bar must carry those values.
+
+    Events are dicts with a "type" of "breakout", "entry" or "exit".
+    """
+
+    def __init__(self, range_window=10, range_pct=0.005, vol_multiplier=1.5, rsi_threshold=60,
+                 lookback=10, max_wait=10, touch="overlap", carry=10, risk_reward="loose",
+                 max_holding=20, indicators=None):
+        if risk_reward not in RISK_REWARD:
+            raise ValueError(f"Unknown risk_reward: {risk_reward}")
+        self.range_window = range_window
+        self.range_pct = range_pct
+        self.vol_multiplier = vol_multiplier
+        self.rsi_threshold = rsi_threshold
+        self.lookback = lookback
+        self.max_wait = max_wait
+        self.touch = touch
+        self.carry = carry
+        self.risk_reward = RISK_REWARD[risk_reward]
+        self.max_holding = max_holding
+        self.indicators = indicators
+
+        # the windows hold the bars *before* the current one
+        self.range_bars = deque(maxlen=range_window)
+        self.swing_bars = deque(maxlen=lookback)
+        self.pending = deque()
+        self.last_zone = None
+        self.open_trades = []
+        self.index = -1
+        self.last_time = None
+        self.last_close = None
+
+    @classmethod
+    def from_variant(cls, variant, **overrides):
+        """Builds an engine with the stage parameters of pipeline.VARIANTS[variant]."""
+        from pipeline import VARIANTS
+
+        stages = VARIANTS[variant]
+        params = {**stages.get("breakouts", {}), **stages.get("ote", {}), **stages.get("entries", {}),
+                  **stages.get("backtest", {})}
+        params["risk_reward"] = stages.get("risk_reward", {}).get("method", "structure")
+        return cls(**{**params, **overrides})
+
+    def update_frame(self, df, forming_last=True, emit=True):
+        """
+        Feeds the bars of `df` newer than the last bar seen and returns their
+        events. With `forming_last=True` the final (still forming) bar is
+        skipped; it is processed once it has closed. `emit=False` only warms
+        the state up from history.
+        """
+        events = []
+        df = df.iloc[:-1] if forming_last else df
+        if self.last_time is not None:
+            df = df[df.index > self.last_time]
+        for timestamp, bar in zip(df.index, df.to_dict("records")):
+            events += self.on_bar(timestamp, bar)
+        return events if emit else []
+
+    def on_bar(self, timestamp, bar):
+        """
+        Processes one closed bar (a mapping with Open/High/Low/Close/Volume,
+        trend_bias and, without an IndicatorState, rsi/vol_avg_20/atr).
+
+        Returns:
+            list: The events this bar triggered.
+        """
+        self.index += 1
+        i = self.index
+        high, low, close = float(bar["High"]), float(bar["Low"]), float(bar["Close"])
+        body = abs(close - float(bar["Open"]))
+        if self.indicators is not None:
+            values = self.indicators.update(high, low, close, float(bar["Volume"]))
+        else:
+            values = bar
+
+        events = self._resolve_trades(timestamp, high, low, close)
+        source = self._touch(high, low, close)
+
+        zone = self._breakout(bar, values, high, low, close, body)
+        if zone is not None:
+            zone["time"] = timestamp
+            if not math.isnan(zone["ote_start"]):
+                self.pending.append(zone)
+                self.last_zone = (i, zone["direction"])
+            events.append({"type": "breakout", **zone})
+
+        if source is not None:
+            events.append(self._open_trade(timestamp, close, float(values["atr"]), source))
+
+        self.range_bars.append((high, low, body))
+        self.swing_bars.append((high, low))
+        self.last_time = timestamp
+        self.last_close = close
+        return events
+
+    def close_all(self):
+        """Times out every open trade on the last close, like the batch backtest at the end of the data."""
+        events = [self._exit(trade, self.last_time, self.index, "timeout", self.last_close) for trade in self.open_trades]
+        self.open_trades = []
+        return events
+
+    def _breakout(self, bar, values, high, low, close, body):
+        i = self.index
+        bias = bar["trend_bias"]
+        bullish, bearish = bias == "bullish", bias == "bearish"
+        if not (bullish or bearish) or i < self.range_window:
+            return None
+
+        max_high = max(b[0] for b in self.range_bars)
+        min_low = min(b[1] for b in self.range_bars)
+        rsi = float(values["rsi"])
+
+        # same rules as breakout_mask; NaN comparisons are False there too
+        if (max_high - min_low) / ((max_high + min_low) / 2) > self.range_pct:
+            return None
+        if (bullish and close <= max_high) or (bearish and close >= min_low):
+            return None
+        if float(bar["Volume"]) < self.vol_multiplier * float(values["vol_avg_20"]):
+            return None
+        if (bullish and rsi < self.rsi_threshold) or (bearish and rsi > 100 - self.rsi_threshold):
+            return None
+        if body < 1.5 * statistics.median(b[2] for b in self.range_bars):
+            return None
+
+        direction = "bullish" if bullish else "bearish"
+        if i < self.lookback:
+            # not enough history for a swing, so the breakout gets no zone
+            return {"index": i, "direction": direction, "ote_start": math.nan, "ote_end": math.nan}
+
+        # OTE zone of calculate_ote_zones: 0.62 / 0.79 retracement of the impulse
+        if bullish:
+            impulse = high - min(b[1] for b in self.swing_bars)
+            ote_start, ote_end = _round(high - 0.62 * impulse), _round(high - 0.79 * impulse)
+        else:
+            impulse = max(b[0] for b in self.swing_bars) - low
+            ote_start, ote_end = _round(low + 0.62 * impulse), _round(low + 0.79 * impulse)
+        return {"index": i, "direction": direction, "ote_start": ote_start, "ote_end": ote_end}
+
+    def _touch(self, high, low, close):
+        """First touch of the waiting zones; the latest touched zone is the entry's source."""
+        while self.pending and self.index - self.pending[0]["index"] > self.max_wait:
+            self.pending.popleft()
+
+        source = None
+        for zone in list(self.pending):
+            start, end = zone["ote_start"], zone["ote_end"]
+            if zone["direction"] == "bullish":
+                reached = low <= end and (high >= start if self.touch == "overlap" else close >= start)
+            else:
+                reached = high >= end and (low <= start if self.touch == "overlap" else close <= start)
+            if reached:
+                # a zone only triggers on its first touch
+                self.pending.remove(zone)
+                source = zone
+        return source
+
+    def _open_trade(self, timestamp, close, atr, source):
+        i = self.index
+        direction = None
+        if self.last_zone is not None and i - self.last_zone[0] <= self.carry:
+            direction = self.last_zone[1]
+
+        levels = dict.fromkeys(["stop_loss", "take_profit_1", "take_profit_2", "rr_1", "rr_2"], math.nan)
+        rr = self.risk_reward
+        if direction is not None and i >= rr["min_index"] and not math.isnan(atr) and atr != 0:
+            sign = 1 if direction == "bullish" else -1
+            levels = {
+                "stop_loss": _round(close - sign * atr),
+                "take_profit_1": _round(close + sign * rr["rr1_mult"] * atr),
+                "take_profit_2": _round(close + sign * rr["rr2_mult"] * atr),
+                "rr_1": _round(rr["rr1_mult"] * atr / atr),
+                "rr_2": _round(rr["rr2_mult"] * atr / atr),
+            }
+
+        trade = {"index": i, "time": timestamp, "direction": direction, "entry_price": close,
+                 "breakout_index": source["index"], "breakout_time": source["time"], **levels}
+        self.open_trades.append(trade)
+        return {"type": "entry", **trade}
+
+    def _resolve_trades(self, timestamp, high, low, close):
+        events = []
+        still_open = []
+        for trade in self.open_trades:
+            direction = trade["direction"]
+            sl, tp1, tp2 = trade["stop_loss"], trade["take_profit_1"], trade["take_profit_2"]
+            if direction == "bullish":
+                hits = [("loss", low <= sl, sl), ("tp2", high >= tp2, tp2), ("tp1", high >= tp1, tp1)]
+            elif direction == "bearish":
+                hits = [("loss", high >= sl, sl), ("tp2", low <= tp2, tp2), ("tp1", low <= tp1, tp1)]
+            else:
+                hits = []
+
+            # SL wins over TP2 which wins over TP1 on the same candle
+            hit = next((h for h in hits if h[1]), None)
+            if hit is not None:
+                events.append(self._exit(trade, timestamp, self.index, hit[0], hit[2]))
+            elif self.index - trade["index"] >= self.max_holding:
+                events.append(self._exit(trade, timestamp, self.index, "timeout", close))
+            else:
+                still_open.append(trade)
+        self.open_trades = still_open
+        return events
+
+    def _exit(self, trade, timestamp, index, result, price):
+        reward = {"loss": -1.0, "tp2": trade["rr_2"], "tp1": trade["rr_1"], "timeout": 0.0}[result]
+        return {
+            "type": "exit",
+            "index": index,
+            "time": timestamp,
+            "entry_index": trade["index"],
+            "entry_time": trade["time"],
+            "direction": trade["direction"],
+            "trade_result": result,
+            "exit_price": _round(price),
+            "reward_achieved": reward,
+            "holding_time": round((timestamp - trade["time"]).total_seconds() / 60, 1),
+        }
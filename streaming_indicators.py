@@ -0,0 +1,221 @@
+from collections import OrderedDict, deque
+
+import numpy as np
+import pandas as pd
+
+# Each indicator keeps only the state its recursion needs, so an update costs
+# the same on the first bar of a session as on the millionth. `update` commits
+# a closed bar, `peek` returns what the value would be without committing it
+# (for a bar that is still forming). Outputs match the `ta` indicators used in
+# add_indicators, including their warm-up values.
+
+class StreamingEMA:
+    """EMA with ta's settings: ewm(span=window, adjust=False), NaN for the first window - 1 bars."""
+
+    def __init__(self, window):
+        self.window = window
+        self.alpha = 2 / (window + 1)
+        self.ema = None
+        self.count = 0
+
+    def _next(self, close):
+        return close if self.ema is None else self.alpha * close + (1 - self.alpha) * self.ema
+
+    def _output(self, ema, count):
+        return ema if count >= self.window else np.nan
+
+    def peek(self, close):
+        return self._output(self._next(close), self.count + 1)
+
+    def update(self, close):
+        self.ema = self._next(close)
+        self.count += 1
+        return self._output(self.ema, self.count)
+
+class StreamingRSI:
+    """Wilder RSI as ta computes it: ewm(alpha=1/window) of up/down moves, 100 when there are no down moves."""
+
+    def __init__(self, window=14):
+        self.window = window
+        self.alpha = 1 / window
+        self.prev_close = None
+        self.avg_up = None
+        self.avg_down = None
+        self.count = 0
+
+    def _next(self, close):
+        # the first bar has no move; ta counts it as a zero move
+        diff = 0.0 if self.prev_close is None else close - self.prev_close
+        up, down = max(diff, 0.0), max(-diff, 0.0)
+        if self.avg_up is None:
+            return up, down
+        return (
+            self.alpha * up + (1 - self.alpha) * self.avg_up,
+            self.alpha * down + (1 - self.alpha) * self.avg_down,
+        )
+
+    def _output(self, avg_up, avg_down, count):
+        if count < self.window:
+            return np.nan
+        if avg_down == 0:
+            return 100.0
+        return 100 - 100 / (1 + avg_up / avg_down)
+
+    def peek(self, close):
+        return self._output(*self._next(close), self.count + 1)
+
+    def update(self, close):
+        self.avg_up, self.avg_down = self._next(close)
+        self.prev_close = close
+        self.count += 1
+        return self._output(self.avg_up, self.avg_down, self.count)
+
+class StreamingATR:
+    """
+    ATR as ta computes it: 0 for the first window - 1 bars, the mean true range
+    of the first `window` bars, then Wilder smoothing.
+    """
+
+    def __init__(self, window=14):
+        self.window = window
+        self.prev_close = None
+        self.tr_sum = 0.0
+        self.atr = 0.0
+        self.count = 0
+
+    def _true_range(self, high, low):
+        if self.prev_close is None:
+            return high - low
+        return max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+
+    def _next(self, high, low):
+        tr = self._true_range(high, low)
+        if self.count < self.window - 1:
+            return self.tr_sum + tr, 0.0
+        if self.count == self.window - 1:
+            return self.tr_sum + tr, (self.tr_sum + tr) / self.window
+        return self.tr_sum, (self.atr * (self.window - 1) + tr) / self.window
+
+    def peek(self, high, low, close):
+        return self._next(high, low)[1]
+
+    def update(self, high, low, close):
+        self.tr_sum, self.atr = self._next(high, low)
+        self.prev_close = close
+        self.count += 1
+        return self.atr
+
+class RollingMean:
+    """Mean of the last `window` values, NaN until the window is full (pandas rolling().mean())."""
+
+    def __init__(self, window=20):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.since_resync = 0
+
+    def peek(self, value):
+        if len(self.values) + 1 < self.window:
+            return np.nan
+        dropped = self.values[0] if len(self.values) == self.window else 0.0
+        return (self.total - dropped + value) / self.window
+
+    def update(self, value):
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+
+        # re-add the window now and then so the running sum cannot drift
+        self.since_resync += 1
+        if self.since_resync >= self.window:
+            self.total = float(sum(self.values))
+            self.since_resync = 0
+        return self.total / self.window if len(self.values) == self.window else np.nan
+
+class IndicatorState:
+    """
+    Streaming version of add_indicators: EMA 50, EMA 200, ATR, RSI and the
+    20-period average volume, updated one closed bar at a time.
+
+    Seed it once with as much history as the slowest indicator needs
+    (`from_history`), then hand it every freshly fetched frame through
+    `update_frame`: only bars newer than the last one seen are processed, so
+    re-fetching an overlapping window costs nothing extra.
+
+    Parameters:
+        ema_windows (tuple): EMA windows, one `ema_<window>` column each.
+        atr_window, rsi_window (int): Windows of ATR and RSI.
+        volume_window (int): Window of the `vol_avg_<window>` column.
+        keep (int): Number of past bars whose values are remembered for
+            `update_frame`; older rows of a fetched frame get NaN.
+    """
+
+    def __init__(self, ema_windows=(50, 200), atr_window=14, rsi_window=14, volume_window=20, keep=1000):
+        self.emas = {f"ema_{w}": StreamingEMA(w) for w in ema_windows}
+        self.atr = StreamingATR(atr_window)
+        self.rsi = StreamingRSI(rsi_window)
+        self.volume = RollingMean(volume_window)
+        self.volume_column = f"vol_avg_{volume_window}"
+        self.keep = keep
+        self.history = OrderedDict()
+        self.last_time = None
+
+    @property
+    def columns(self):
+        return [*self.emas, "atr", "rsi", self.volume_column]
+
+    @classmethod
+    def from_history(cls, df, forming_last=True, **params):
+        """Seeds a new state from a history frame (see update_frame)."""
+        state = cls(**params)
+        state.update_frame(df, forming_last=forming_last)
+        return state
+
+    def update(self, high, low, close, volume):
+        """Commits one closed bar and returns its indicator values."""
+        values = [ema.update(close) for ema in self.emas.values()]
+        values += [self.atr.update(high, low, close), self.rsi.update(close), self.volume.update(volume)]
+        return dict(zip(self.columns, values))
+
+    def peek(self, high, low, close, volume):
+        """Indicator values of a bar that is still forming, without committing it."""
+        values = [ema.peek(close) for ema in self.emas.values()]
+        values += [self.atr.peek(high, low, close), self.rsi.peek(close), self.volume.peek(volume)]
+        return dict(zip(self.columns, values))
+
+    def update_frame(self, df, forming_last=True):
+        """
+        Returns a copy of `df` with the indicator columns filled in.
+
+        Bars newer than the last committed bar are committed in order; with
+        `forming_last=True` the final bar is only peeked, so it is committed
+        once it has closed and shows up again in a later fetch.
+        """
+        n = len(df)
+        closed = n - 1 if forming_last else n
+        bars = zip(df.index, df["High"].to_numpy(dtype=float), df["Low"].to_numpy(dtype=float),
+                   df["Close"].to_numpy(dtype=float), df["Volume"].to_numpy(dtype=float))
+
+        rows = []
+        for i, (timestamp, high, low, close, volume) in enumerate(bars):
+            is_new = self.last_time is None or timestamp > self.last_time
+            if i < closed and is_new:
+                values = self.update(high, low, close, volume)
+                self._remember(timestamp, values)
+            elif i >= closed and is_new:
+                values = self.peek(high, low, close, volume)
+            else:
+                values = self.history.get(timestamp, {})
+            rows.append([values.get(c, np.nan) for c in self.columns])
+
+        values = pd.DataFrame(np.array(rows, dtype=float).reshape(n, len(self.columns)), index=df.index, columns=self.columns)
+        # one concat instead of a column insert per indicator
+        stale = [c for c in self.columns if c in df.columns]
+        return pd.concat([df.drop(columns=stale) if stale else df, values], axis=1)
+
+    def _remember(self, timestamp, values):
+        self.last_time = timestamp
+        self.history[timestamp] = values
+        while len(self.history) > self.keep:
+            self.history.popitem(last=False)
@@ -3,8 +3,7 @@ from a_backtest import (
     detect_breakouts, calculate_ote_zones, detect_entry_signals,
     set_risk_reward, run_backtest
 )
-import pandas as pd
-import os
+from results_store import ResultsStore, trade_records
 
 def main():
     symbol = "BTC-USD"
@@ -26,26 +25,18 @@ def main():
     ltf_df = calculate_ote_zones(ltf_df)
     ltf_df = detect_entry_signals(ltf_df)
 
-    ltf_df["ote_dir"] = ltf_df["ote_dir"].fillna(method="ffill", limit=10)
+    ltf_df["ote_dir"] = ltf_df["ote_dir"].ffill(limit=10)
 
     # Step 5: Risk-Reward + Backtest
     ltf_df = set_risk_reward(ltf_df)
     result_df = run_backtest(ltf_df)
 
-    # ✅ Step 6: Clean up invalid entries (fix order here)
-    for i in result_df[result_df["is_entry"]].index:
-        breakout_time = result_df.loc[i, "entry_from_breakout_time"]
-        if pd.isna(breakout_time) or not result_df.loc[breakout_time, "is_breakout"]:
-            result_df.at[i, "is_entry"] = False
-            result_df.at[i, "entry_price"] = None
-            result_df.at[i, "entry_time"] = None
-
-    # ✅ Step 7: Save filtered results
+    # ✅ Step 6: Save filtered results
     filtered_df = result_df[(result_df["is_breakout"] == True) | (result_df["is_entry"] == True)]
     #filtered_df.to_csv("BTC_backtest_results.csv")
     #print("✅ Results saved to_"+symbol+"_Backtest_results.csv (breakouts and entries only)")
 
-    # Step 8: Summary
+    # Step 7: Summary
     entries = result_df[result_df["is_entry"] == True]
     wins = entries[entries["trade_result"].isin(["tp1", "tp2"])]
     losses = entries[entries["trade_result"] == "loss"]
@@ -53,6 +44,8 @@ def main():
     summary_data = {
         "symbol": symbol,
         "test_type": 'A',
+        "ltf_period": "60d",
+        "htf_period": "1y",
         "total_breakouts": int(result_df["is_breakout"].sum()),
         "entries": int(len(entries)),
         "wins": int(len(wins)),
@@ -62,15 +55,14 @@ def main():
         "net_r": round(entries["reward_achieved"].sum(), 2) if len(entries) else 0
     }
 
-    summary_df = pd.DataFrame([summary_data])
-
-    file_path = "backtest_result_1y.csv"
-    if os.path.exists(file_path):
-        summary_df.to_csv(file_path, mode='a', header=False, index=False)
-    else:
-        summary_df.to_csv(file_path, index=False)
+    # a rerun replaces its row; the CSV is an export of this run's rows plus
+    # the rows the file held before it was first attached to the database
+    with ResultsStore() as db:
+        db.attach_csv("backtest_result_1y.csv", "test_1y")
+        db.upsert(summary_data, trades=trade_records(result_df), run_id="test_1y")
+        db.export_attached("backtest_result_1y.csv")
 
-    print("✅ Summary appended to backtest_result_1y.csv")
+    print("✅ Summary saved to backtest_results.sqlite and exported to backtest_result_1y.csv")
 
 
 if __name__ == "__main__":
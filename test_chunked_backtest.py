@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+
+from chunked_backtest import ChunkedBacktest, run_sharded_backtest, shard_bounds
+from pipeline import Pipeline
+
+# (chunk size, bars): sizes above and below the back halo (31 bars with the
+# defaults); the small ones run on a shorter series to keep the test fast.
+CHUNKINGS = [(7, 2_000), (30, 4_000), (333, None), (4999, None)]
+OVERRIDES = {
+    "breakouts": {"range_window": 20},
+    "ote": {"lookback": 15},
+    "entries": {"max_wait": 15},
+    "backtest": {"max_holding": 40},
+}
+
+def chunked(df, size, first=250):
+    """`df` in `size`-row chunks after a first one covering the longest indicator window (ema_200)."""
+    yield df.iloc[:first]
+    for start in range(first, len(df), size):
+        yield df.iloc[start:start + size]
+
+@pytest.fixture(scope="module")
+def serial(bars):
+    _, htf = bars
+    runs = {}
+    def run(ltf, variant, params=None):
+        key = (len(ltf), variant, params is not None)
+        if key not in runs:
+            runs[key] = Pipeline(variant, params, copy=True, track_memory=False).run(ltf, htf)
+        return runs[key]
+    return run
+
+@pytest.mark.parametrize("size, length", CHUNKINGS)
+@pytest.mark.parametrize("variant", ["A", "B"])
+def test_chunked_matches_pipeline(bars, serial, variant, size, length):
+    ltf, htf = bars
+    ltf = ltf.iloc[:length]
+    out = pd.concat(ChunkedBacktest(variant).run(chunked(ltf, size), htf))
+    pd.testing.assert_frame_equal(out, serial(ltf, variant), check_exact=True)
+
+@pytest.mark.parametrize("size, length", [(7, 2_000), (700, None)])
+@pytest.mark.parametrize("variant", ["A", "B"])
+def test_chunked_matches_pipeline_with_overrides(bars, serial, variant, size, length):
+    """Longer windows widen the halos (back 36, forward 40 bars here)."""
+    ltf, htf = bars
+    ltf = ltf.iloc[:length]
+    backtest = ChunkedBacktest(variant, OVERRIDES)
+    assert (backtest.back, backtest.forward) == (36, 40)
+    out = pd.concat(backtest.run(chunked(ltf, size), htf))
+    pd.testing.assert_frame_equal(out, serial(ltf, variant, OVERRIDES), check_exact=True)
+
+def test_first_chunk_must_cover_warmup(bars):
+    ltf, htf = bars
+    with pytest.raises(ValueError):
+        list(ChunkedBacktest("A").run(chunked(ltf, 100, first=100), htf))
+
+@pytest.mark.parametrize("shards, max_workers", [(3, 1), (7, 1), (6, 2), (7, 3)])
+@pytest.mark.parametrize("variant", ["A", "B"])
+def test_sharded_matches_pipeline(bars, serial, variant, shards, max_workers):
+    """max_workers=1 runs the shards in this process, the others on a pool with more shards than workers."""
+    ltf, htf = bars
+    out = run_sharded_backtest(ltf, htf, variant, shards=shards, max_workers=max_workers)
+    pd.testing.assert_frame_equal(out, serial(ltf, variant), check_exact=True)
+
+def test_shard_bounds_cover_every_row_once():
+    bounds = shard_bounds(1000, 7, back=31, forward=30)
+    assert [start for start, *_ in bounds] == [0, *(stop for _, stop, *_ in bounds[:-1])]
+    assert bounds[-1][1] == 1000
+    for start, stop, window_start, window_stop in bounds:
+        assert window_start == max(0, start - 31) and window_stop == min(1000, stop + 30)
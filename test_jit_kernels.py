@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+from ta.volatility import AverageTrueRange
+
+import jit_kernels
+from pipeline import Pipeline
+
+LOOPS = "numba" if jit_kernels.HAVE_NUMBA else "python"
+
+def with_nans(values, share=0.01, seed=0):
+    """A copy of `values` with a `share` of them set to NaN, plus a run of NaNs."""
+    values = np.array(values, dtype=float)
+    rng = np.random.default_rng(seed)
+    values[rng.random(len(values)) < share] = np.nan
+    values[len(values) // 2:len(values) // 2 + 5] = np.nan
+    return values
+
+@pytest.mark.parametrize("variant", ["A", "B"])
+def test_pipeline_parity(bars, variant):
+    """The ote, entries and backtest stages are bit-identical with the NumPy and the loop kernels."""
+    ltf, htf = bars
+    previous = jit_kernels.get_backend()
+    results = {}
+    try:
+        for backend in ("numpy", LOOPS):
+            jit_kernels.set_backend(backend)
+            results[backend] = Pipeline(variant, copy=True, track_memory=False).run(ltf, htf)
+    finally:
+        jit_kernels.set_backend(previous)
+    assert results["numpy"]["is_entry"].sum() > 0
+    pd.testing.assert_frame_equal(results["numpy"], results[LOOPS], check_exact=True)
+
+@pytest.mark.parametrize("nans", [False, True])
+@pytest.mark.parametrize("lookback", [1, 10])
+def test_swing_extremes_loop(bars, nans, lookback):
+    ltf, _ = bars
+    high, low = ltf["High"].to_numpy(dtype=float), ltf["Low"].to_numpy(dtype=float)
+    if nans:
+        high, low = with_nans(high, seed=1), with_nans(low, seed=2)
+    swing_low, swing_high = jit_kernels.swing_extremes_loop(high, low, lookback)
+    np.testing.assert_array_equal(swing_low, pd.Series(low).rolling(lookback).min().shift(1).to_numpy())
+    np.testing.assert_array_equal(swing_high, pd.Series(high).rolling(lookback).max().shift(1).to_numpy())
+
+@pytest.mark.parametrize("nans", [False, True])
+@pytest.mark.parametrize("chunk", [None, 1, 777])
+def test_rolling_mean_loop(bars, nans, chunk):
+    """Fed whole or in chunks, the means equal pandas' rolling mean bit for bit."""
+    ltf, _ = bars
+    window = 20
+    volume = ltf["Volume"].to_numpy(dtype=float)
+    if nans:
+        volume = with_nans(volume)
+    expected = pd.Series(volume).rolling(window).mean().to_numpy()
+
+    chunk = chunk or len(volume)
+    state = jit_kernels.rolling_mean_state(volume[0])
+    tail = np.empty(0)
+    parts = []
+    for start in range(0, len(volume), chunk):
+        values = volume[start:start + chunk]
+        parts.append(jit_kernels.rolling_mean_loop(values, window, tail, state))
+        tail = np.r_[tail, values][-window:]
+    np.testing.assert_array_equal(np.concatenate(parts), expected)
+
+@pytest.mark.parametrize("nans", [False, True])
+def test_wilder_atr_loop(bars, nans):
+    """Seeded like ta (mean of the first `window` true ranges), the recursion equals ta's ATR."""
+    ltf, _ = bars
+    window = 14
+    df = ltf[["High", "Low", "Close"]].astype(float)
+    if nans:
+        for seed, column in enumerate(df.columns):
+            df[column] = with_nans(df[column], seed=seed)
+    expected = AverageTrueRange(df["High"], df["Low"], df["Close"], window=window).average_true_range().to_numpy()
+
+    prev_close = df["Close"].shift(1)
+    true_range = pd.DataFrame({
+        "tr1": df["High"] - df["Low"], "tr2": (df["High"] - prev_close).abs(), "tr3": (df["Low"] - prev_close).abs(),
+    }).max(axis=1).to_numpy()
+    first = pd.Series(true_range[:window]).mean()
+    atr = np.zeros(len(df))
+    atr[window - 1] = first
+    atr[window:] = jit_kernels.wilder_atr_loop(true_range[window:], window, first)
+    np.testing.assert_array_equal(atr, expected)
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline import Pipeline
+from signal_engine import SignalEngine
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume", "trend_bias", "rsi", "vol_avg_20", "atr"]
+
+def events_by_type(events, kind):
+    return pd.DataFrame([e for e in events if e["type"] == kind])
+
+@pytest.mark.parametrize("variant", ["A", "B"])
+def test_bar_by_bar_matches_pipeline(bars, variant):
+    """
+    The batch rows fed through on_bar give the same breakouts, entries and
+    levels; B's exits match too. A's TP2 and exits differ by design (the
+    batch caps TP2 with the next 30 candles).
+    """
+    ltf, htf = bars
+    full = Pipeline(variant, copy=True, track_memory=False).run(ltf, htf)
+    engine = SignalEngine.from_variant(variant)
+    events = []
+    for timestamp, bar in zip(full.index, full[COLUMNS].to_dict("records")):
+        events += engine.on_bar(timestamp, bar)
+    events += engine.close_all()
+
+    breakouts = events_by_type(events, "breakout")
+    assert list(breakouts["time"]) == list(full.index[full["is_breakout"] == True])
+
+    batch = full[full["is_entry"] == True]
+    entries = events_by_type(events, "entry")
+    assert len(batch) > 0
+    assert list(entries["time"]) == list(batch.index)
+    assert list(entries["breakout_index"]) == list(batch["entry_from_breakout_idx"])
+    levels = ["stop_loss", "take_profit_1"] + (["take_profit_2"] if variant == "B" else [])
+    for column in levels:
+        np.testing.assert_array_equal(entries[column].to_numpy(dtype=float), batch[column].to_numpy(dtype=float))
+
+    if variant == "B":
+        exits = events_by_type(events, "exit").sort_values("entry_time")
+        assert list(exits["entry_time"]) == list(batch.index)
+        assert list(exits["trade_result"]) == list(batch["trade_result"].astype(str))
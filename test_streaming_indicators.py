@@ -0,0 +1,20 @@
+import numpy as np
+import pandas as pd
+
+from a_backtest import add_indicators
+from streaming_indicators import IndicatorState
+
+def test_update_matches_add_indicators(bars):
+    """IndicatorState.update, row by row, equals ta's indicators including their warm-up values."""
+    ltf, _ = bars
+    expected = add_indicators(ltf.copy())
+    state = IndicatorState()
+    rows = [state.update(bar["High"], bar["Low"], bar["Close"], bar["Volume"])
+            for bar in ltf[["High", "Low", "Close", "Volume"]].to_dict("records")]
+    streamed = pd.DataFrame(rows, index=ltf.index)
+
+    assert state.columns == ["ema_50", "ema_200", "atr", "rsi", "vol_avg_20"]
+    for column in ["ema_50", "ema_200", "atr", "rsi"]:
+        np.testing.assert_allclose(streamed[column], expected[column], rtol=0, atol=1e-9, equal_nan=True)
+    # a plain running sum, not pandas' compensated one: equal up to rounding
+    np.testing.assert_allclose(streamed["vol_avg_20"], expected["vol_avg_20"], rtol=1e-12, equal_nan=True)
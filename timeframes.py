@@ -0,0 +1,140 @@
+import pandas as pd
+
+from bar_store import _to_utc, interval_to_timedelta
+
+# How each column combines into a higher timeframe bar (missing columns are skipped)
+OHLCV_AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Adj Close": "last", "Volume": "sum"}
+
+def base_interval(index):
+    """The bar spacing of a DatetimeIndex (its most common step)."""
+    if len(index) < 2:
+        raise ValueError("need at least two bars to infer the interval")
+    return pd.Series(index[1:] - index[:-1]).mode().iloc[0]
+
+# A pause this long between two bars separates trading sessions (overnight,
+# weekends); 24/7 markets only have shorter holes from missing bars.
+SESSION_GAP = pd.Timedelta(hours=6)
+EPOCH = pd.Timestamp(0, tz="UTC")
+
+def session_opens(index):
+    """Timestamps of the bars that open a session (the first bar after a SESSION_GAP)."""
+    if len(index) < 2:
+        return index[:0]
+    return index[1:][(index[1:] - index[:-1]) >= SESSION_GAP]
+
+def has_sessions(index):
+    """True for bars of a market with trading sessions (equities), False for 24/7 ones (crypto)."""
+    return len(session_opens(index)) > 0
+
+def grid_offset(index, step):
+    """The most common offset of `index` from the epoch-aligned `step` grid."""
+    if len(index) == 0:
+        return pd.Timedelta(0)
+    offsets = (_to_utc(index) - EPOCH) % step
+    return pd.Series(offsets).mode().iloc[0]
+
+def session_offset(index, step):
+    """
+    Bin offset that lines intraday `step` bins up with the session opens, e.g.
+    30 minutes for hourly bars of a session opening at 9:30 (the grid Yahoo's
+    hourly equity bars use). 0 for 24/7 series and for daily or longer bins,
+    which stay on UTC days.
+    """
+    opens = session_opens(index)
+    if len(opens) == 0 or step >= pd.Timedelta(days=1):
+        return pd.Timedelta(0)
+    return grid_offset(opens, step)
+
+def resample_timeframe(df, interval, base=None, label="open", offset=None):
+    """
+    Aggregates OHLCV bars into `interval` bars ("1h", "4h", "1d", ...).
+
+    Bins are aligned to the epoch (whole hours, 4h blocks from 00:00 UTC,
+    UTC days), like exchange and Yahoo crypto candles, shifted by the
+    session open for intraday bins of a session market (see session_offset).
+
+    `complete` is True only for bins holding their full count of base bars:
+    step / base, or for daily and longer bins of a session market the
+    longest session's count. The still-forming last bar, a first bar that
+    starts before the data, a bin with missing base bars and the short last
+    bin of a session (15:30 on a 9:30-16:00 session) are incomplete.
+
+    Parameters:
+        df (pd.DataFrame): Base bars, DatetimeIndex labelled by open time.
+        interval (str): Target interval, a multiple of the base interval.
+        base (pd.Timedelta): Base interval (default: inferred from the index).
+        label (str): "open" labels bars by their open time (as Yahoo and
+            classify_trend_bias' lag expect), "close" by their close time.
+        offset (pd.Timedelta): Bin offset from the epoch grid (default:
+            session_offset of the base bars).
+
+    Returns:
+        pd.DataFrame: The aggregated columns plus the bool `complete`.
+    """
+    if label not in ("open", "close"):
+        raise ValueError(f"label must be 'open' or 'close', got {label!r}")
+    step = interval_to_timedelta(interval)
+    base = base_interval(df.index) if base is None else pd.Timedelta(base)
+    if step < base or step % base:
+        raise ValueError(f"{interval} is not a multiple of the base interval {base}")
+
+    agg = {column: how for column, how in OHLCV_AGG.items() if column in df.columns}
+    if df.empty:
+        return pd.DataFrame(columns=[*agg, "complete"])
+
+    offset = session_offset(df.index, step) if offset is None else pd.Timedelta(offset)
+    resampler = df.resample(step, origin="epoch", offset=offset)
+    bars = resampler.agg(agg)
+    counts = resampler["Close"].count()
+    bars = bars[counts > 0].dropna(subset=["Close"])
+    counts = counts[bars.index]
+
+    expected = step // base
+    if step >= pd.Timedelta(days=1) and has_sessions(df.index):
+        expected = min(expected, int(counts.max()))
+    bars["complete"] = (counts == expected).to_numpy()
+    if label == "close":
+        bars.index = bars.index + step
+    return bars
+
+def build_timeframes(df, intervals=("1h", "4h", "1d"), base=None, label="open"):
+    """resample_timeframe of one base series into several intervals, as {interval: bars}."""
+    base = base_interval(df.index) if base is None else pd.Timedelta(base)
+    return {interval: resample_timeframe(df, interval, base, label) for interval in intervals}
+
+def resampled_htf(ltf_df, htf_interval, htf_start, fetch):
+    """
+    HTF bars from `htf_start` on, resampled from the LTF bars wherever they
+    cover the period. Only the older part, before the first complete
+    resampled bar, comes from `fetch(start, end)`, and only if the HTF
+    period reaches back further than the LTF data.
+
+    The fetched bars must lie on the same grid as the resampled ones, so the
+    joined series keeps one spacing; a ValueError says when they do not
+    (e.g. Yahoo's daily equity bars, labelled at New York midnight).
+    """
+    step = interval_to_timedelta(htf_interval)
+    offset = session_offset(ltf_df.index, step)
+    htf = resample_timeframe(ltf_df, htf_interval, offset=offset)
+    # drop the partial bins before the first complete one
+    complete = htf.index[htf["complete"].to_numpy()]
+    htf = htf[htf.index >= complete[0]] if len(complete) else htf.iloc[-1:]
+    cut = htf.index[0] if len(htf) else pd.Timestamp.max.tz_localize("UTC")
+
+    if htf_start < cut:
+        older = fetch(htf_start, cut)
+        if older is not None and len(older):
+            older = older.copy()
+            older.index = _to_utc(pd.DatetimeIndex(older.index))
+            older = older[older.index < cut]
+            if len(older) and grid_offset(older.index, step) != offset:
+                raise ValueError(
+                    f"fetched {htf_interval} bars are offset {grid_offset(older.index, step)} from the epoch grid, "
+                    f"the resampled ones {offset}; download the HTF series instead (resample_htf=False)"
+                )
+            older["complete"] = True
+            htf = pd.concat([older, htf])
+
+    # keep the bin htf_start falls in
+    first_bin = EPOCH + offset + ((htf_start - EPOCH - offset) // step) * step
+    return htf[htf.index >= first_bin]
@@ -0,0 +1,226 @@
+import csv
+import glob
+import math
+import os
+import queue
+import threading
+import time
+
+import pandas as pd
+
+# One row per entry or exit event, in this column order
+TRADE_SCHEMA = {
+    "symbol": "category",
+    "event": "category",
+    "time": "datetime64[ns, UTC]",
+    "direction": "category",
+    "entry_time": "datetime64[ns, UTC]",
+    "entry_price": "float64",
+    "stop_loss": "float64",
+    "take_profit_1": "float64",
+    "take_profit_2": "float64",
+    "rr_1": "float64",
+    "rr_2": "float64",
+    "breakout_time": "datetime64[ns, UTC]",
+    "trade_result": "category",
+    "exit_price": "float64",
+    "reward_achieved": "float64",
+    "holding_time": "float64",
+}
+COLUMNS = list(TRADE_SCHEMA)
+FSYNC_POLICIES = ("never", "flush", "close")
+
+_CLOSE = object()
+
+def trade_record(symbol, event):
+    """Compact journal row (a tuple in COLUMNS order) of a SignalEngine entry/exit event."""
+    row = {"symbol": symbol, "event": event["type"], **event}
+    if event["type"] == "entry":
+        row["entry_time"] = event["time"]
+    return tuple(_format(row.get(column)) for column in COLUMNS)
+
+def _format(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value
+
+class TradeJournal:
+    """
+    Append-only trade journal with a single writer thread.
+
+    `log` only puts the event on a queue and returns at once, so the signal
+    path never waits on the disk; when the queue is full the event is
+    dropped and counted in `dropped`. The writer drains the queue in batches
+    and writes them when `flush_rows` rows are pending or `flush_seconds`
+    passed since the last write.
+
+    Rows go to <root>/trades.<NNNNNN>.csv; once a segment reaches `max_bytes`
+    the next one is started, older segments are never touched again.
+
+    Parameters:
+        root (str): Directory of the journal.
+        flush_rows (int): Rows that trigger a write.
+        flush_seconds (float): Longest time a row waits before it is written.
+        fsync (str): "flush" fsyncs after every write, "close" only when a
+            segment is closed, "never" leaves it to the OS.
+        max_bytes (int): Segment size that starts a new segment.
+        max_queue (int): Events buffered before `log` starts dropping.
+    """
+
+    def __init__(self, root="trade_journal", flush_rows=256, flush_seconds=1.0, fsync="flush",
+                 max_bytes=64 * 2**20, max_queue=100_000):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+        self.root = root
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.fsync = fsync
+        self.max_bytes = max_bytes
+        self.queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self.logged = 0
+        self.dropped = 0
+        self.written = 0
+        self.flushes = 0
+        self.error = None
+        self._file = None
+        self._writer = None
+        self._segment = None
+
+        os.makedirs(root, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="trade-journal", daemon=True)
+        self._thread.start()
+
+    def log(self, symbol, event):
+        """Queues an entry/exit event (other event types are ignored). Never blocks."""
+        if event.get("type") not in ("entry", "exit"):
+            return False
+        try:
+            self.queue.put_nowait(trade_record(symbol, event))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.logged += 1
+        return True
+
+    def close(self, timeout=None):
+        """Writes everything still queued and closes the segment."""
+        if self._thread.is_alive():
+            self.queue.put(_CLOSE)
+            self._thread.join(timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self):
+        pending = []
+        deadline = time.monotonic() + self.flush_seconds
+        closing = False
+        while not closing:
+            try:
+                item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if item is _CLOSE:
+                closing = True
+            elif item is not None:
+                pending.append(item)
+                # take whatever else is queued without waiting
+                while len(pending) < self.flush_rows:
+                    try:
+                        item = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _CLOSE:
+                        closing = True
+                        break
+                    pending.append(item)
+
+            if pending and (closing or len(pending) >= self.flush_rows or time.monotonic() >= deadline):
+                self._write(pending)
+                pending = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_seconds
+        self._close_segment()
+
+    def _write(self, rows):
+        try:
+            if self._file is None:
+                self._open_segment()
+            self._writer.writerows(rows)
+            self._file.flush()
+            if self.fsync == "flush":
+                os.fsync(self._file.fileno())
+            self.written += len(rows)
+            self.flushes += 1
+            if self._file.tell() >= self.max_bytes:
+                self._close_segment()
+        except OSError as e:
+            # the writer keeps running; the failed batch is lost but counted
+            self.error = e
+            with self._lock:
+                self.dropped += len(rows)
+            print("⚠️ Trade journal write failed:", e)
+
+    def _open_segment(self):
+        segments = journal_segments(self.root)
+        number = int(segments[-1].rsplit(".", 2)[-2]) if segments else 0
+        path = segments[-1] if segments else None
+        if path is None or os.path.getsize(path) >= self.max_bytes:
+            path = os.path.join(self.root, f"trades.{number + 1:06d}.csv")
+        self._segment = path
+        self._file = open(path, "a", newline="")
+        self._writer = csv.writer(self._file)
+        if self._file.tell() == 0:
+            self._writer.writerow(COLUMNS)
+
+    def _close_segment(self):
+        if self._file is None:
+            return
+        self._file.flush()
+        if self.fsync != "never":
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        self._writer = None
+
+def journal_segments(root):
+    """Segment files of a journal, oldest first."""
+    return sorted(glob.glob(os.path.join(root, "trades.[0-9]*.csv")))
+
+def read_journal(root="trade_journal", symbols=None, events=None):
+    """
+    Loads a journal into one typed DataFrame (see TRADE_SCHEMA), in the
+    order the rows were written.
+
+    Parameters:
+        symbols (list): Optional symbols to keep.
+        events (list): Optional event types to keep, e.g. ["exit"].
+    """
+    numeric = {c: t for c, t in TRADE_SCHEMA.items() if t == "float64"}
+    text = {c: "string" for c, t in TRADE_SCHEMA.items() if t != "float64"}
+    frames = [
+        pd.read_csv(path, dtype={**numeric, **text}, float_precision="round_trip")
+        for path in journal_segments(root)
+    ]
+    if not frames:
+        return pd.DataFrame({c: pd.Series(dtype=t) for c, t in TRADE_SCHEMA.items()})
+
+    df = pd.concat(frames, ignore_index=True)
+    if symbols is not None:
+        df = df[df["symbol"].isin(symbols)]
+    if events is not None:
+        df = df[df["event"].isin(events)]
+    for column, dtype in TRADE_SCHEMA.items():
+        if dtype == "category":
+            df[column] = df[column].astype("category")
+        elif dtype.startswith("datetime"):
+            df[column] = pd.to_datetime(df[column], utc=True, format="ISO8601").astype(dtype)
+    return df.reset_index(drop=True)
@@ -1,35 +1,55 @@
+import numpy as np
 import pandas as pd
 
-def classify_trend_bias(ltf_df, htf_df):
+def align_to_htf(ltf_index, htf_index, lag=0):
+    """
+    Maps every LTF timestamp to the position of the most recent HTF candle
+    (as-of join) in a single sorted pass.
+
+    Parameters:
+        ltf_index (pd.DatetimeIndex): Timestamps of the low time frame bars.
+        htf_index (pd.DatetimeIndex): Sorted timestamps of the high time frame bars.
+        lag (int): Number of HTF bars to step back from the as-of match. With
+            bars labelled by their open time, lag=1 only uses HTF candles that
+            have already closed (no look-ahead).
+
+    Returns:
+        np.ndarray: Integer positions into htf_index, -1 where no HTF bar is available.
+    """
+    if lag < 0:
+        raise ValueError("lag must be >= 0")
+
+    pos = htf_index.searchsorted(ltf_index, side="right") - 1 - lag
+    pos[pos < 0] = -1
+    return pos
+
+def classify_trend_bias(ltf_df, htf_df, lag=0, copy=True):
+    """
+    Labels every LTF bar bullish/bearish/neutral from the EMA 50/200 of its HTF candle.
+    `lag` is passed to align_to_htf (use 1 to ignore the still-forming HTF bar).
+    """
     #make sure both Dataframe are datetime indexed
-    ltf_df = ltf_df.copy()
-    htf_df = htf_df.copy()
+    if copy:
+        ltf_df = ltf_df.copy()
     ltf_df.index = pd.to_datetime(ltf_df.index)
-    htf_df.index = pd.to_datetime(htf_df.index)
-
-    #Create a trend_bias column
-    trend_bias = []
-
-    for timestamp in ltf_df.index:
-        #find the most recent HTF candle <== current LTF timeframe
-        htf_time = htf_df.index[htf_df.index <= timestamp].max()
-
-        if pd.isna(htf_time):
-            trend_bias.append('neutral')
-            continue
-
-        row = htf_df.loc[htf_time]
-        ema_50 = row['ema_50']
-        ema_200 = row['ema_200']
-
-        if pd.isna(ema_50) or pd.isna(ema_200):
-            trend_bias.append("neutral")
-        elif ema_50 > ema_200:
-            trend_bias.append('bullish')
-        elif ema_50 < ema_200:
-            trend_bias.append('bearish')
-        else:
-            trend_bias.append('neutral')
-
-    ltf_df['trend_bias'] = trend_bias
-    return ltf_df
\ No newline at end of file
+    htf_index = pd.to_datetime(htf_df.index)
+
+    # searchsorted needs a sorted HTF index
+    order = np.argsort(htf_index.values, kind="stable")
+    htf_index = htf_index[order]
+    ema_50 = htf_df["ema_50"].to_numpy(dtype=float)[order]
+    ema_200 = htf_df["ema_200"].to_numpy(dtype=float)[order]
+
+    if len(htf_index) == 0:
+        ltf_df['trend_bias'] = 'neutral'
+        return ltf_df
+
+    #find the most recent HTF candle <= current LTF timeframe, for all bars at once
+    pos = align_to_htf(ltf_df.index, htf_index, lag=lag)
+    has_htf = pos >= 0
+    fast = np.where(has_htf, ema_50[pos], np.nan)
+    slow = np.where(has_htf, ema_200[pos], np.nan)
+
+    # NaN EMAs compare False on both sides and fall through to neutral
+    ltf_df['trend_bias'] = np.select([fast > slow, fast < slow], ['bullish', 'bearish'], default='neutral')
+    return ltf_df
@@ -0,0 +1,137 @@
+import itertools
+import time
+
+import pandas as pd
+
+from param_sweep import PARAM_ORDER, FeatureCache, ParamSweep, variant_params
+
+def walk_forward_windows(index, train="30D", test="7D", step="7D", start=None):
+    """
+    Train/test windows sliding over a DatetimeIndex: train covers
+    [t, t + train), test the `test` period right after it, and t moves by
+    `step`. Only windows whose test period lies fully inside the data are kept.
+
+    Returns:
+        pd.DataFrame: One row per window with train_start / train_end /
+        test_start / test_end timestamps and the matching positional
+        train_from / train_to / test_from / test_to (end exclusive).
+    """
+    train, test, step = pd.Timedelta(train), pd.Timedelta(test), pd.Timedelta(step)
+    if len(index) < 2:
+        return pd.DataFrame()
+    # end of the data = close of the last bar
+    end = index[-1] + (index[-1] - index[-2])
+    t = index[0] if start is None else pd.Timestamp(start)
+
+    rows = []
+    while t + train + test <= end:
+        bounds = [t, t + train, t + train, t + train + test]
+        positions = index.searchsorted(bounds)
+        rows.append({
+            "train_start": bounds[0], "train_end": bounds[1], "test_start": bounds[2], "test_end": bounds[3],
+            "train_from": positions[0], "train_to": positions[1], "test_from": positions[2], "test_to": positions[3],
+        })
+        t += step
+    return pd.DataFrame(rows)
+
+class WalkForward:
+    """
+    Walk-forward evaluation of one dataset.
+
+    Indicators, trend bias and the rolling features are computed once over
+    the full history (param_sweep.FeatureCache) and every parameter
+    combination is run once over the full series. Each window then only
+    counts the breakouts and trades entered inside it, so hundreds of
+    windows cost about one full-history run per combination.
+
+    A trade belongs to the window it was entered in and runs to its own
+    exit, even past the window end. Train windows drop the trades entered
+    in their last ParamSweep.lookahead bars (max_holding, or the 30-bar TP2
+    cap of the structure risk/reward if longer), so no train trade reads a
+    bar of the test period through its exit or its TP2 level.
+
+    Parameters:
+        ltf_df, htf_df (pd.DataFrame): OHLCV bars (or an LTF frame that already
+            has indicators and trend_bias).
+        train, test, step (str): Window lengths and stride, e.g. "30D", "7D", "7D".
+        start (str): First train start (default: first bar).
+    """
+
+    def __init__(self, ltf_df, htf_df=None, train="30D", test="7D", step="7D", start=None):
+        self.sweep = ParamSweep(FeatureCache(ltf_df, htf_df))
+        self.windows = walk_forward_windows(self.sweep.cache.index, train, test, step, start)
+
+    def run(self, params="A", grid=None, metric="net_r", labels=None):
+        """
+        Evaluates every test window.
+
+        Parameters:
+            params: Variant name ("A", "B"), {stage: params} or flat sweep
+                parameters; the fixed parameters, or the base of `grid`.
+            grid (dict): Optional {param: [values]}; per window the combination
+                with the best `metric` on the train window is used on the test window.
+            metric (str): Summary field to optimise.
+            labels (dict): Extra columns, e.g. symbol / test_type / ltf_period /
+                htf_period to match ab_test's summary rows.
+
+        Returns:
+            pd.DataFrame: One row per window: its bounds, the chosen
+            parameters and train metric (with a grid), then the test summary.
+        """
+        base = _sweep_params(params)
+        combos = [{}]
+        if grid:
+            unknown = set(grid) - set(PARAM_ORDER)
+            if unknown:
+                raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+            names = [k for k in PARAM_ORDER if k in grid]
+            combos = [dict(zip(names, values)) for values in itertools.product(*(grid[k] for k in names))]
+
+        # combinations outside, windows inside: each combination is computed once
+        best = [None] * len(self.windows)
+        windows = list(self.windows.itertuples(index=False))
+        for combo in combos:
+            signals = self.sweep.signals(**{**base, **combo})
+            purge = self.sweep.lookahead(**{**base, **combo})
+            for i, w in enumerate(windows):
+                score = None
+                if grid:
+                    train = self.sweep.summarize(signals, (w.train_from, w.train_to), purge=purge)
+                    score = train[metric]
+                    if best[i] is not None and score <= best[i][0]:
+                        continue
+                test = self.sweep.summarize(signals, (w.test_from, w.test_to))
+                best[i] = (score, combo, test)
+
+        rows = []
+        for i, w in enumerate(windows):
+            score, combo, test = best[i]
+            row = {"window": i, "train_start": w.train_start, "train_end": w.train_end,
+                   "test_start": w.test_start, "test_end": w.test_end}
+            if grid:
+                row.update(combo)
+                row[f"train_{metric}"] = score
+            rows.append({**row, **(labels or {}), **test})
+        return pd.DataFrame(rows)
+
+def _sweep_params(params):
+    if isinstance(params, str) or any(isinstance(v, dict) for v in params.values()):
+        return variant_params(params)
+    return dict(params)
+
+def run_walk_forward(ltf_df, htf_df, params="A", train="30D", test="7D", step="7D", grid=None, metric="net_r",
+                     labels=None):
+    """
+    Walk-forward run of one dataset, e.g.
+
+        run_walk_forward(ltf, htf, "B", train="30D", test="7D", step="7D",
+                         grid={"range_pct": [0.005, 0.01], "max_holding": [10, 20]})
+
+    Returns:
+        pd.DataFrame: One summary row per test window, see WalkForward.run.
+    """
+    started = time.perf_counter()
+    wf = WalkForward(ltf_df, htf_df, train, test, step)
+    result = wf.run(params, grid, metric, labels)
+    print(f"⏱️ {len(result)} walk-forward windows in {time.perf_counter() - started:.2f}s")
+    return result